@@ -2,9 +2,10 @@
 最短共通超配列問題 (Shortest Common Supersequence Problem, SCSP).
 """
 
-from . import example, model, util
+from . import bench, example, model, util
 
 __all__ = [
+    "bench",
     "example",
     "model",
     "util",
@@ -0,0 +1,269 @@
+"""
+.. include:: ./README.md
+"""
+
+import csv
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import time
+import typing
+from collections import deque
+from collections.abc import Iterable, Sequence
+from dataclasses import asdict, dataclass, field, fields
+
+import numpy as np
+
+from .. import example, util
+
+__all__ = [
+    "Job",
+    "Result",
+    "grid",
+    "run",
+]
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    ベンチマークの 1 回分の実行.
+
+    Attributes:
+        Model(type[util.ScspModel]): 最適化モデルクラス
+        instance(str | os.PathLike): サンプルインスタンスファイル名またはインスタンスファイルのパス
+        params(dict[str, object]): `solve` に渡す追加の引数
+        seed(int): 乱数シード. `random` と `numpy.random` に設定する.
+        time_limit(int | None): 計算時間上限
+        target_gap(float | None): 相対ギャップがこの値以下になったら探索を打ち切る.
+            `util.progress` に対応したモデルでのみ有効.
+    """
+
+    Model: type[util.ScspModel]
+    instance: str | os.PathLike
+    params: dict[str, object] = field(default_factory=dict)
+    seed: int = 0
+    time_limit: int | None = 60
+    target_gap: float | None = None
+
+
+@dataclass
+class Result:
+    """
+    ベンチマークの 1 回分の結果. 各属性が CSV ファイルの列になる.
+    """
+
+    model: str
+    instance: str
+    params: str
+    seed: int
+    time_limit: int | None
+    target_gap: float | None
+    status: str
+    objective: int | None = None
+    best_bound: float | None = None
+    gap: float | None = None
+    gap_integral: float | None = None
+    wall: float | None = None
+    cpu: float | None = None
+    peak_rss: int | None = None
+    phase_times: str | None = None
+    num_vars: int | None = None
+    num_constraints: int | None = None
+    error: str | None = None
+
+
+def grid(
+    Models: Iterable[type[util.ScspModel]],
+    instances: Iterable[str | os.PathLike],
+    params: Iterable[dict[str, object]] = ({},),
+    seeds: Iterable[int] = (0,),
+    time_limit: int | None = 60,
+    target_gap: float | None = None,
+) -> list[Job]:
+    """
+    モデル, インスタンス, パラメータ, シードの全ての組み合わせのジョブを作る.
+
+    Args:
+        Models(Iterable[type[util.ScspModel]]): 最適化モデルクラスのリスト
+        instances(Iterable[str | os.PathLike]): サンプルインスタンスファイル名またはインスタンスファイルのパスのリスト
+        params(Iterable[dict[str, object]]): `solve` に渡す追加の引数のリスト
+        seeds(Iterable[int]): 乱数シードのリスト
+        time_limit(int | None): 各ジョブの計算時間上限
+        target_gap(float | None): 各ジョブの目標相対ギャップ
+    """
+
+    instances, params, seeds = list(instances), list(params), list(seeds)
+    return [
+        Job(Model, instance, param, seed, time_limit, target_gap)
+        for Model in Models
+        for instance in instances
+        for param in params
+        for seed in seeds
+    ]
+
+
+def run(
+    jobs: Sequence[Job],
+    output: str | os.PathLike,
+    *,
+    workers: int | None = None,
+    cpus_per_job: int = 1,
+    grace: float = 30.0,
+    log: bool = False,
+) -> list[Result]:
+    """
+    ジョブを並列に実行し, 結果を CSV ファイルに書き出して返す.
+
+    各ジョブは個別のプロセスで実行し, `cpus_per_job` 個の CPU に固定する.
+    `time_limit + grace` 秒経っても終わらないジョブは強制終了して `killed` とする.
+
+    Args:
+        jobs(Sequence[Job]): ジョブのリスト
+        output(str | os.PathLike): 出力する CSV ファイル名
+        workers(int | None): 同時に実行するジョブ数. 指定しなければ利用可能な CPU 数 / `cpus_per_job`.
+        cpus_per_job(int): 1 ジョブに割り当てる CPU 数
+        grace(float): 強制終了までの猶予 (秒)
+        log(bool): 最適化モデルのログ出力を有効にするか
+    """
+
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if workers is None:
+        workers = max(1, len(cpus or range(os.cpu_count() or 1)) // cpus_per_job)
+
+    # CPU が足りなければ固定しない
+    slots: list[list[int] | None]
+    if len(cpus) >= workers * cpus_per_job:
+        slots = [
+            cpus[k * cpus_per_job : (k + 1) * cpus_per_job] for k in range(workers)
+        ]
+    else:
+        slots = [None] * workers
+
+    context = multiprocessing.get_context()
+    pending = deque(enumerate(jobs))
+    # プロセスの sentinel -> (ジョブ番号, プロセス, 結果の受信側, 強制終了時刻, 割り当てた CPU)
+    running: dict[int, tuple[int, typing.Any, typing.Any, float, list[int] | None]] = {}
+    results: list[Result | None] = [None] * len(jobs)
+
+    with open(output, mode="w", encoding="UTF-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=[f.name for f in fields(Result)])
+        writer.writeheader()
+        file.flush()
+
+        while pending or running:
+            while pending and slots:
+                idx, job = pending.popleft()
+                slot = slots.pop()
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_worker, args=(job, slot, sender, log), daemon=True
+                )
+                process.start()
+                sender.close()
+                deadline = (
+                    time.monotonic() + job.time_limit + grace
+                    if job.time_limit is not None
+                    else float("inf")
+                )
+                running[process.sentinel] = (idx, process, receiver, deadline, slot)
+
+            timeout = min(deadline for _, _, _, deadline, _ in running.values())
+            timeout = max(0.0, timeout - time.monotonic())
+            ready = multiprocessing.connection.wait(
+                list(running), timeout=None if timeout == float("inf") else timeout
+            )
+
+            for sentinel in list(running):
+                idx, process, receiver, deadline, slot = running[sentinel]
+                if sentinel in ready:
+                    values = receiver.recv() if receiver.poll() else None
+                    process.join()
+                    if values is None:
+                        values = {
+                            "status": "crashed",
+                            "error": f"exit code {process.exitcode}",
+                        }
+                elif time.monotonic() > deadline:
+                    process.kill()
+                    process.join()
+                    values = {"status": "killed"}
+                else:
+                    continue
+
+                receiver.close()
+                del running[sentinel]
+                slots.append(slot)
+
+                result = Result(**_describe(jobs[idx]), **values)
+                results[idx] = result
+                writer.writerow(asdict(result))
+                file.flush()
+
+    return [result for result in results if result is not None]
+
+
+def _describe(job: Job) -> dict[str, typing.Any]:
+    return {
+        "model": job.Model.__module__.rsplit(".", 1)[-1],
+        "instance": os.fspath(job.instance),
+        "params": json.dumps(job.params, default=repr, sort_keys=True),
+        "seed": job.seed,
+        "time_limit": job.time_limit,
+        "target_gap": job.target_gap,
+    }
+
+
+def _load(instance: str | os.PathLike) -> list[str] | util.Instance:
+    if instance in typing.get_args(example.ExampleFileName):
+        return example.load(typing.cast(example.ExampleFileName, instance))
+    return util.parse(instance)
+
+
+def _worker(job: Job, cpus: list[int] | None, sender: typing.Any, log: bool) -> None:
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    random.seed(job.seed)
+    np.random.seed(job.seed)
+
+    try:
+        instance = _load(job.instance)
+        recorder = util.progress.ProgressRecorder(job.target_gap)
+        measured = util.metrics.measure(
+            job.Model(instance),
+            time_limit=job.time_limit,
+            log=log,
+            on_progress=recorder,
+            **job.params,
+        )
+    except Exception as e:  # noqa: BLE001  ジョブの失敗は結果として記録する
+        sender.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+        return
+
+    if measured.solution is None:
+        status = "no_solution"
+    elif not util.is_feasible(instance, measured.solution):
+        status = "infeasible"
+    else:
+        status = "ok"
+
+    objective = measured.objective
+    sender.send(
+        {
+            "status": status,
+            "objective": objective,
+            "best_bound": measured.best_bound,
+            "gap": (objective - measured.best_bound) / objective if objective else None,
+            "gap_integral": recorder.gap_integral(measured.wall)
+            if recorder.history
+            else None,
+            "wall": measured.wall,
+            "cpu": measured.cpu,
+            "peak_rss": measured.peak_rss,
+            "phase_times": json.dumps(measured.phase_times),
+            "num_vars": measured.num_vars,
+            "num_constraints": measured.num_constraints,
+        }
+    )
@@ -6,6 +6,13 @@ import pathlib
 from typing import Literal
 
 from .. import util
+from . import generate
+
+__all__ = [
+    "ExampleFileName",
+    "generate",
+    "load",
+]
 
 ExampleFileName = Literal[
     "nucleotide_n005k010.txt",
@@ -43,9 +50,11 @@ ExampleFileName = Literal[
 ]
 
 
-def load(filename: ExampleFileName) -> list[str]:
+def load(filename: ExampleFileName) -> list[str] | util.Instance:
     """
     サンプルデータセット読み込み.
+
+    `util.parse` で読み込むので, バイナリ形式 (`util.container`) のファイルも読める.
     """
 
     data_dir = pathlib.Path(__file__).parent
@@ -0,0 +1,325 @@
+"""
+問題インスタンスの生成.
+
+各関数は numpy の乱数生成器で全ての文字をまとめて生成し, `util.Instance` を返す.
+`seed` には整数のほか `numpy.random.SeedSequence` や `numpy.random.Generator` を渡せる.
+
+`suite` と `write_suite` は `SeedSequence.spawn` でインスタンスごとに独立した乱数列を割り当てるので,
+並列数によらず同じシードから同じインスタンス群が得られる.
+"""
+
+import concurrent.futures
+import os
+import pathlib
+import string
+from collections.abc import Callable
+from typing import Any, Literal
+
+import numpy as np
+
+from .. import util
+
+type Seed = int | np.random.SeedSequence | np.random.Generator
+type Family = Literal["uniform", "nucleotide", "protein", "planted"]
+
+UNIFORM_CHARS = string.ascii_letters + string.digits + string.punctuation
+"""
+一様ランダム生成で使う文字. 先頭から `q` 文字を使う.
+"""
+
+NUCLEOTIDE_FREQUENCIES = {"A": 0.258, "C": 0.226, "G": 0.241, "T": 0.275}
+"""
+塩基の出現頻度. サンプルデータセット `nucleotide_n100k500.txt` から求めた.
+"""
+
+PROTEIN_FREQUENCIES = {
+    "A": 0.0616,
+    "C": 0.0264,
+    "D": 0.0515,
+    "E": 0.0606,
+    "F": 0.0520,
+    "G": 0.0748,
+    "H": 0.0221,
+    "I": 0.0533,
+    "K": 0.0598,
+    "L": 0.0862,
+    "M": 0.0163,
+    "N": 0.0586,
+    "P": 0.0429,
+    "Q": 0.0326,
+    "R": 0.0458,
+    "S": 0.0681,
+    "T": 0.0625,
+    "V": 0.0715,
+    "W": 0.0113,
+    "Y": 0.0420,
+}
+"""
+アミノ酸の出現頻度. サンプルデータセット `protein_n100k500.txt` から求めた.
+"""
+
+
+def uniform(q: int, n: int, k_min: int, k_max: int, seed: Seed = 0) -> util.Instance:
+    """
+    `UNIFORM_CHARS` の先頭 `q` 文字から一様ランダムに文字を選んで並べたインスタンスを生成する.
+
+    低確率で全く同じ文字列が生成される可能性があることに注意.
+
+    Args:
+        q(int): 使用文字種類数. 1 以上 94 以下.
+        n(int): 文字列数
+        k_min(int): 文字列長の下限
+        k_max(int): 文字列長の上限. 実際の文字列長は `[k_min, k_max]` から一様ランダムに決める.
+        seed(Seed): 乱数シード
+    """
+
+    assert 1 <= q <= len(UNIFORM_CHARS)
+    rng = np.random.default_rng(seed)
+    return _random_strings(rng, UNIFORM_CHARS[:q], None, n, k_min, k_max)
+
+
+def nucleotide(
+    n: int, k_min: int, k_max: int | None = None, seed: Seed = 0
+) -> util.Instance:
+    """
+    塩基 `ACGT` を `NUCLEOTIDE_FREQUENCIES` の頻度で独立に選んで並べたインスタンスを生成する.
+
+    Args:
+        n(int): 文字列数
+        k_min(int): 文字列長の下限
+        k_max(int | None): 文字列長の上限. 指定しなければ `k_min` と同じ.
+        seed(Seed): 乱数シード
+    """
+
+    rng = np.random.default_rng(seed)
+    return _from_frequencies(rng, NUCLEOTIDE_FREQUENCIES, n, k_min, k_max)
+
+
+def protein(
+    n: int, k_min: int, k_max: int | None = None, seed: Seed = 0
+) -> util.Instance:
+    """
+    20 種類のアミノ酸を `PROTEIN_FREQUENCIES` の頻度で独立に選んで並べたインスタンスを生成する.
+
+    Args:
+        n(int): 文字列数
+        k_min(int): 文字列長の下限
+        k_max(int | None): 文字列長の上限. 指定しなければ `k_min` と同じ.
+        seed(Seed): 乱数シード
+    """
+
+    rng = np.random.default_rng(seed)
+    return _from_frequencies(rng, PROTEIN_FREQUENCIES, n, k_min, k_max)
+
+
+def planted(
+    q: int,
+    n: int,
+    length: int,
+    k_min: int,
+    k_max: int | None = None,
+    seed: Seed = 0,
+) -> tuple[util.Instance, str]:
+    """
+    長さ `length` の一様ランダムな文字列 (テンプレート) を作り,
+    その部分配列をランダムに `n` 本取り出したインスタンスを生成する.
+
+    インスタンスとテンプレートの組を返す.
+    テンプレートは共通超配列なので, 最適値の上界 `len(template)` が分かる.
+    どの文字列にも使われないテンプレートの文字は `util.embedding.compact` で取り除いてある.
+
+    Args:
+        q(int): 使用文字種類数. 1 以上 94 以下.
+        n(int): 文字列数
+        length(int): テンプレートの長さ
+        k_min(int): 文字列長の下限
+        k_max(int | None): 文字列長の上限. 指定しなければ `k_min` と同じ. `length` 以下.
+        seed(Seed): 乱数シード
+    """
+
+    k_max = k_min if k_max is None else k_max
+    assert 1 <= q <= len(UNIFORM_CHARS)
+    assert n >= 1
+    assert 1 <= k_min <= k_max <= length
+
+    rng = np.random.default_rng(seed)
+    template = rng.integers(q, size=length)
+    lengths = rng.integers(k_min, k_max + 1, size=n)
+
+    # 各行でランダムな順位を付け, 順位が文字列長未満の位置を残すと一様ランダムな部分配列になる
+    ranks = rng.random((n, length)).argsort(axis=1).argsort(axis=1)
+    mask = ranks < lengths[:, None]
+    codes = np.broadcast_to(template, (n, length))[mask]
+
+    chars = UNIFORM_CHARS[:q]
+    instance = _encode(chars, codes, lengths)
+    template_str = "".join(chars[c] for c in template.tolist())
+    return instance, util.embedding.compact(instance, template_str)
+
+
+GENERATORS: dict[str, Callable[..., Any]] = {
+    "uniform": uniform,
+    "nucleotide": nucleotide,
+    "protein": protein,
+    "planted": planted,
+}
+"""
+インスタンス族の名前と生成関数の対応.
+"""
+
+
+def suite(
+    family: Family,
+    count: int,
+    *,
+    seed: int = 0,
+    workers: int | None = None,
+    **params: Any,
+) -> list[Any]:
+    """
+    同じパラメータのインスタンスを `count` 個生成して返す.
+
+    要素は生成関数の返り値で, `planted` ではインスタンスとテンプレートの組になる.
+
+    Args:
+        family(Family): インスタンス族. `GENERATORS` のキー.
+        count(int): 生成するインスタンス数
+        seed(int): 乱数シード. `SeedSequence(seed).spawn(count)` で各インスタンスに割り当てる.
+        workers(int | None): 並列に生成するプロセス数. 指定しなければ CPU 数.
+        params: 生成関数に渡す `seed` 以外の引数
+    """
+
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    return _map(workers, _generate, [(family, s, params) for s in seeds])
+
+
+def write_suite(
+    directory: str | os.PathLike,
+    family: Family,
+    count: int,
+    *,
+    seed: int = 0,
+    workers: int | None = None,
+    binary: bool = False,
+    **params: Any,
+) -> list[pathlib.Path]:
+    """
+    `suite` と同じインスタンスを生成し, 各プロセスから直接ファイルに書き出してパスのリストを返す.
+
+    ファイル名は `{family}_{パラメータ}_{番号}.txt` の形式で, パラメータの表記はサンプルデータセットに揃える.
+    `binary` なら `util.container` 形式で `.bin` に書き出し, `planted` のテンプレートを解として含める.
+    テキスト形式の `planted` ではテンプレートを拡張子 `.sol` のファイルに書き出す.
+
+    Args:
+        directory(str | os.PathLike): 出力先ディレクトリ. なければ作る.
+        family(Family): インスタンス族. `GENERATORS` のキー.
+        count(int): 生成するインスタンス数
+        seed(int): 乱数シード
+        workers(int | None): 並列に生成するプロセス数. 指定しなければ CPU 数.
+        binary(bool): バイナリ形式で書き出すか
+        params: 生成関数に渡す `seed` 以外の引数
+    """
+
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"{family}_{_describe(family, params)}"
+    suffix = ".bin" if binary else ".txt"
+    paths = [directory / f"{stem}_{idx:04}{suffix}" for idx in range(count)]
+
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    _map(
+        workers,
+        _write,
+        [(family, s, params, path) for s, path in zip(seeds, paths)],
+    )
+    return paths
+
+
+def _map(workers: int | None, func: Callable[..., Any], args: list[tuple]) -> list:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(args) <= 1:
+        return [func(*a) for a in args]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(args) // (4 * workers))
+        return list(executor.map(func, *zip(*args), chunksize=chunksize))
+
+
+def _generate(
+    family: Family, seed: np.random.SeedSequence, params: dict[str, Any]
+) -> Any:
+    return GENERATORS[family](**params, seed=seed)
+
+
+def _write(
+    family: Family,
+    seed: np.random.SeedSequence,
+    params: dict[str, Any],
+    path: pathlib.Path,
+) -> None:
+    generated = _generate(family, seed, params)
+    instance, template = generated if family == "planted" else (generated, None)
+
+    if path.suffix == ".bin":
+        util.container.dump(instance, path, solution=template)
+        return
+
+    util.save(instance, path)
+    if template is not None:
+        path.with_suffix(".sol").write_text(template + "\n", encoding="UTF-8")
+
+
+def _describe(family: Family, params: dict[str, Any]) -> str:
+    k_min = params["k_min"]
+    k_max = params.get("k_max")
+    k = f"k{k_min:0>3}" if k_max is None else f"k{k_min:0>3}-{k_max:0>3}"
+    if family == "uniform":
+        return f"q{params['q']:0>2}n{params['n']:0>3}{k}"
+    if family == "planted":
+        return f"q{params['q']:0>2}n{params['n']:0>3}l{params['length']:0>3}{k}"
+    return f"n{params['n']:0>3}{k}"
+
+
+def _from_frequencies(
+    rng: np.random.Generator,
+    frequencies: dict[str, float],
+    n: int,
+    k_min: int,
+    k_max: int | None,
+) -> util.Instance:
+    chars = "".join(frequencies)
+    p = np.array(list(frequencies.values()))
+    return _random_strings(rng, chars, p / p.sum(), n, k_min, k_max)
+
+
+def _random_strings(
+    rng: np.random.Generator,
+    chars: str,
+    p: np.ndarray | None,
+    n: int,
+    k_min: int,
+    k_max: int | None,
+) -> util.Instance:
+    k_max = k_min if k_max is None else k_max
+    assert n >= 1
+    assert 1 <= k_min <= k_max
+
+    lengths = rng.integers(k_min, k_max + 1, size=n)
+    codes = rng.choice(len(chars), size=int(lengths.sum()), p=p)
+    return _encode(chars, codes, lengths)
+
+
+def _encode(chars: str, codes: np.ndarray, lengths: np.ndarray) -> util.Instance:
+    # 現れない文字をアルファベットから除き, ソート済みのアルファベットの添字に付け替える
+    used = np.zeros(len(chars), dtype=np.bool_)
+    used[codes] = True
+    kept = sorted(np.flatnonzero(used).tolist(), key=chars.__getitem__)
+    remap = np.zeros(len(chars), dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    alphabet = "".join(chars[c] for c in kept)
+    dtype = util.instance.code_dtype(len(alphabet))
+    return util.Instance(alphabet, remap[codes].astype(dtype), offsets)
@@ -6,6 +6,7 @@ from . import (
     alphabet,
     alphabet_reduction,
     automaton_cpsat,
+    beam,
     descending,
     didp,
     didp_scs3,
@@ -34,6 +35,7 @@ __all__ = [
     "alphabet",
     "alphabet_reduction",
     "automaton_cpsat",
+    "beam",
     "descending",
     "didp",
     "didp_scs3",
@@ -4,10 +4,12 @@
 
 from dataclasses import dataclass
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
@@ -2,29 +2,48 @@
 .. include:: ./README.md
 """
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 
+import numpy as np
+
+from ... import util
+
+
+def column_marks(instance: Sequence[str]) -> np.ndarray:
+    """
+    各列 (各文字列の `j` 文字目) に現れる文字の集合を bitset で返す.
+
+    `(最大文字列長, ceil(q / 64))` 型の uint64 配列で,
+    列 `j` に文字 `chars[c]` が現れるとき `marks[j, c // 64]` の `c % 64` ビット目が立つ.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+    """
+
+    instance = util.as_instance(instance)
+    words = (len(instance.chars) + 63) // 64
+    lengths = instance.lengths
+    columns = np.arange(len(instance.codes)) - np.repeat(instance.offsets[:-1], lengths)
+
+    used = np.zeros((int(lengths.max(initial=0)), 64 * words), dtype=np.bool_)
+    used[columns, instance.codes] = True
+    return np.packbits(used, axis=1, bitorder="little").view("<u8")
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
     def solve(self, *args, **kwargs) -> str | None:
-        chars = "".join(sorted(set("".join(self.instance))))
-        solution = ""
-
-        for i in range(max([len(s) for s in self.instance])):
-            used = [False for _ in chars]
-            for s in self.instance:
-                if i >= len(s):
-                    continue
-                used[chars.index(s[i])] = True
-
-            for c, u in zip(chars, used):
-                if u:
-                    solution += c
+        instance = util.as_instance(self.instance)
+        marks = column_marks(instance)
 
-        self.solution = solution
+        # 列ごとに立っているビットの文字をアルファベット順に並べる
+        used = np.unpackbits(marks.view(np.uint8), axis=1, bitorder="little")
+        _, codes = np.nonzero(used[:, : len(instance.chars)])
+        chars = np.array(list(instance.chars))
+        self.solution = "".join(chars[codes].tolist())
         return self.solution
@@ -0,0 +1,469 @@
+"""
+.. include:: ./README.md
+"""
+
+import concurrent.futures
+import contextlib
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from ... import util
+
+
+@dataclass
+class Beam:
+    """
+    ビームに含まれる状態たち.
+
+    解の文字列は持たず, 1 つ前のビームの状態への添字と追加した文字で表す.
+
+    Attributes:
+        positions(np.ndarray): `(状態数, n)` 型の配列で, 各状態における各文字列の先頭位置
+        parents(np.ndarray): 各状態の親の 1 つ前のビームにおける添字
+        codes(np.ndarray): 各状態で親の解に追加した文字の添字
+    """
+
+    positions: np.ndarray
+    parents: np.ndarray
+    codes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def select(self, indices: np.ndarray) -> "Beam":
+        """
+        `indices` の順に状態を取り出したビームを返す.
+        """
+
+        return Beam(self.positions[indices], self.parents[indices], self.codes[indices])
+
+
+def expand(beam: Beam, padded: np.ndarray, num_chars: int) -> Beam:
+    """
+    各状態から残された文字列の先頭に現れる文字を 1 つ追加して得られる状態を全て集める.
+
+    状態は親の順に, 同じ親からは追加した文字の添字の順に並べる.
+
+    Args:
+        beam(Beam): 現在のビーム
+        padded(np.ndarray): `(n, 最大文字列長 + 1)` 型の配列で, 各文字列の添字を `num_chars` で埋めたもの
+        num_chars(int): 文字種数
+    """
+
+    n = padded.shape[0]
+    fronts = padded[np.arange(n), beam.positions]
+    usable = np.zeros((len(beam), num_chars + 1), dtype=np.bool_)
+    usable[np.arange(len(beam))[:, None], fronts] = True
+    parents, codes = np.nonzero(usable[:, :num_chars])
+    positions = beam.positions[parents] + (fronts[parents] == codes[:, None])
+    return Beam(positions, parents, codes)
+
+
+def make_prob_table(num_chars: int, max_len: int) -> list[list[float]]:
+    """
+    以下の値が入っている 2 次元配列 p を返す:
+    p[q][k] = 一様ランダムに生成された長さ q の文字列 w と長さ k の文字列 y に対して, w が y の subsequence になる確率
+    """
+
+    nrow = max_len + 1
+    ncol = math.ceil(max_len * math.log2(num_chars)) + 1
+
+    ret = [[0.0 for k in range(ncol)] for q in range(nrow)]
+    for q in range(nrow):
+        for k in range(ncol):
+            if q == 0:
+                ret[q][k] = 1.0
+            elif q > k:
+                ret[q][k] = 0.0
+            else:
+                tmp1 = 1.0 / num_chars * ret[q - 1][k - 1]
+                tmp2 = (num_chars - 1) / num_chars * ret[q][k - 1]
+                ret[q][k] = tmp1 + tmp2
+
+    return ret
+
+
+def heuristic(rests: np.ndarray, prob_table: np.ndarray, k: int) -> np.ndarray:
+    """
+    各状態について, 残された文字列がそれぞれ長さ `k` のランダムな文字列の部分配列になる確率の積を返す.
+
+    積は文字列の順に 1 つずつ掛ける.
+
+    Args:
+        rests(np.ndarray): `(状態数, n)` 型の配列で, 各状態における各文字列の残りの長さ
+        prob_table(np.ndarray): `make_prob_table` の返り値
+        k(int): 残りの部分の SCS 長の推定値
+    """
+
+    scores = np.ones(len(rests))
+    for rest in rests.T:
+        scores *= prob_table[rest, k]
+    return scores
+
+
+def unique(positions: np.ndarray) -> np.ndarray:
+    """
+    先頭位置が一致する状態をまとめ, それぞれ最初に現れる状態の添字を昇順で返す.
+
+    Args:
+        positions(np.ndarray): `(状態数, n)` 型の配列で, 各状態における各文字列の先頭位置
+    """
+
+    positions = np.ascontiguousarray(positions)
+    rows = positions.view(np.dtype((np.void, positions.itemsize * positions.shape[1])))
+    _, first = np.unique(rows.ravel(), return_index=True)
+    return np.sort(first)
+
+
+def pareto_front(positions: np.ndarray) -> np.ndarray:
+    """
+    他のどの状態にも支配されない状態の先頭位置を, 先頭位置の和の降順に並べて返す. 重複は 1 つにまとめる.
+
+    和の降順に調べると後の状態が前の状態を支配することはないので,
+    それまでに得られた front に以上となるものがなければ front に加える.
+
+    Args:
+        positions(np.ndarray): `(状態数, n)` 型の配列で, 各状態における各文字列の先頭位置
+    """
+
+    order = np.argsort(-positions.sum(axis=1), kind="stable")
+    front = np.empty_like(positions)
+    size = 0
+    for position in positions[order]:
+        if not (front[:size] >= position).all(axis=1).any():
+            front[size] = position
+            size += 1
+    return front[:size]
+
+
+def dominated(positions: np.ndarray, kappa: int, block: int = 256) -> np.ndarray:
+    """
+    先頭 `kappa` 個の状態のいずれかに支配される状態を表す bool 型の配列を返す.
+
+    状態 A が状態 B を支配するとは, 全ての文字列で A の先頭位置が B 以上であり, かつ一致しないことをいう.
+    支配関係は推移的なので, 先頭 `kappa` 個の Pareto front とだけ比較すればよい.
+    さらに支配する側は先頭位置の和が真に大きいので, `block` 個ずつの状態に対して
+    和がその最小値より大きい front の状態とだけまとめて比較する.
+
+    Args:
+        positions(np.ndarray): `(状態数, n)` 型の配列で, 各状態における各文字列の先頭位置
+        kappa(int): 支配する側として調べる状態数
+        block(int): まとめて比較する状態数
+    """
+
+    result = np.zeros(len(positions), dtype=np.bool_)
+    if kappa <= 0 or len(positions) == 0:
+        return result
+
+    front = pareto_front(positions[:kappa])
+    front_sums = front.sum(axis=1)
+    sums = positions.sum(axis=1)
+    for start in range(0, len(positions), block):
+        stop = start + block
+        # front_sums は降順なので, 和が min(sums) より大きい front は先頭から数えられる
+        size = int(np.searchsorted(-front_sums, -sums[start:stop].min(), side="left"))
+        candidates = front[:size, None, :]
+        targets = positions[None, start:stop, :]
+        geq = (candidates >= targets).all(axis=2)
+        neq = (candidates != targets).any(axis=2)
+        result[start:stop] = (geq & neq).any(axis=0)
+    return result
+
+
+@dataclass
+class Problem:
+    """
+    ビームサーチで参照する問題インスタンスの情報.
+
+    Attributes:
+        instance(util.Instance): 問題インスタンス
+    """
+
+    instance: util.Instance
+
+    @cached_property
+    def num_chars(self) -> int:
+        """
+        文字種数.
+        """
+
+        return len(self.instance.chars)
+
+    @cached_property
+    def lengths(self) -> np.ndarray:
+        """
+        各文字列の長さ.
+        """
+
+        return self.instance.lengths
+
+    @cached_property
+    def padded(self) -> np.ndarray:
+        """
+        `(n, 最大文字列長 + 1)` 型の配列で, 各文字列の添字を `num_chars` で埋めたもの.
+        """
+
+        return np.pad(
+            self.instance.padded(self.num_chars),
+            ((0, 0), (0, 1)),
+            constant_values=self.num_chars,
+        )
+
+    @cached_property
+    def prob_table(self) -> np.ndarray:
+        """
+        `make_prob_table` の返り値.
+        """
+
+        max_len = int(self.lengths.max()) if len(self.lengths) > 0 else 0
+        return np.array(make_prob_table(self.num_chars, max_len))
+
+    @cached_property
+    def scs2(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        全ての組の 2 文字列 SCS 長テーブル (`util.tables.scs2`) と, 組ごとの文字列の番号, 開始位置, 行の幅の配列.
+        """
+
+        util.tables.compute(self.instance, ("scs2",))
+        flat = self.instance.tables["scs2"]
+        index = self.instance.tables["scs2_index"]
+        n = len(self.instance)
+        first, second = np.tril_indices(n, k=-1)
+        pairs = first * (first - 1) // 2 + second
+        return flat, first, second, index[pairs], self.lengths[second] + 1
+
+
+@dataclass(frozen=True)
+class Layer:
+    """
+    同じ長さの解を持つ状態たちに共通する情報.
+
+    Attributes:
+        depth(int): 解の長さ
+        max_rest(int): 状態たちにおける残りの文字列長の最大値
+    """
+
+    depth: int
+    max_rest: int
+
+
+type Scorer = Callable[[Problem, np.ndarray, Layer], np.ndarray]
+"""
+`(problem, positions, layer)` を受け取って各状態の評価値 (大きいほど良い) を返す関数.
+`positions` は `(状態数, n)` 型の各状態における各文字列の先頭位置の配列.
+"""
+
+
+def sum_height(problem: Problem, positions: np.ndarray, layer: Layer) -> np.ndarray:
+    """
+    削除した文字の総数. 幅 1 では Majority Merge (`mm`) と同じ解になる.
+    """
+
+    return positions.sum(axis=1).astype(np.float64)
+
+
+def sum_weight(problem: Problem, positions: np.ndarray, layer: Layer) -> np.ndarray:
+    """
+    削除した文字の重みの総和. 文字の重みは削除したときの残りの文字列長とする.
+    幅 1 では Weighted Majority Merge (`wmm`) と同じ解になる.
+    """
+
+    weights = positions * problem.lengths - positions * (positions - 1) // 2
+    return weights.sum(axis=1).astype(np.float64)
+
+
+def probability(problem: Problem, positions: np.ndarray, layer: Layer) -> np.ndarray:
+    """
+    残された文字列がそれぞれ長さ `k` のランダムな文字列の部分配列になる確率の積.
+    `k` は `ceil(log2(q) * layer.max_rest)` とする. IBS_SCS (`ibs_scs`) の評価値.
+    """
+
+    k = math.ceil(math.log2(problem.num_chars) * layer.max_rest)
+    return heuristic(problem.lengths - positions, problem.prob_table, k)
+
+
+def scs2_bound(
+    problem: Problem, positions: np.ndarray, layer: Layer, block: int = 1 << 20
+) -> np.ndarray:
+    """
+    残された文字列の全ての組の SCS 長の最大値 (`didp` の下界) に -1 を掛けた値.
+    前計算テーブルは `util.tables.scs2` を用いる.
+
+    下界が同じ状態が多いので, 1 未満に正規化した `sum_height` を足して同点を分ける.
+    """
+
+    rests = problem.lengths - positions
+    bound = rests.max(axis=1, initial=0)
+    tiebreak = positions.sum(axis=1) / (problem.lengths.sum() + 1)
+    flat, first, second, starts, widths = problem.scs2
+    if len(first) == 0:
+        return tiebreak - bound
+
+    # (状態数, 組の数) の添字配列が block 要素程度になるように分けて引く
+    step = max(1, block // len(first))
+    for start in range(0, len(positions), step):
+        chunk = positions[start : start + step]
+        lookup = starts + chunk[:, first] * widths + chunk[:, second]
+        bound[start : start + step] = np.maximum(
+            bound[start : start + step], flat[lookup].max(axis=1)
+        )
+    return tiebreak - bound
+
+
+SCORERS: dict[str, Scorer] = {
+    "sum_height": sum_height,
+    "sum_weight": sum_weight,
+    "probability": probability,
+    "scs2_bound": scs2_bound,
+}
+"""
+名前で指定できる評価関数.
+"""
+
+
+def search(
+    instance: list[str] | util.Instance,
+    scorer: Scorer,
+    beta: int,
+    kappa: int = 0,
+    dedup: bool = True,
+    workers: int | None = None,
+) -> str:
+    """
+    ビームサーチで解を求める.
+
+    各反復では以下を行う.
+
+    1. 各状態から残された文字列の先頭に現れる文字を 1 つ追加した状態を全て集める (`expand`).
+       全ての文字列を削除し終えた状態があれば, 最初のものの解を返す.
+    1. `dedup` なら先頭位置が一致する状態を 1 つにまとめる (`unique`).
+    1. 評価値の降順 (同じなら 1 の順) に並べ, 上位 `kappa` 個のいずれかに支配される状態を除く (`dominated`).
+    1. 上位 `beta` 個を次のビームとする.
+
+    `workers` に 2 以上を指定すると, 評価値の計算を状態の組に分けてプロセスプールで行う.
+    各プロセスは初期化時に `Problem` を 1 度だけ受け取る. 結果は並列数によらない.
+
+    Args:
+        instance(list[str] | util.Instance): 問題インスタンス
+        scorer(Scorer): 評価関数. プロセスプールを使う場合はモジュールの最上位で定義された関数とする.
+        beta(int): ビーム幅
+        kappa(int): 支配する側として調べる上位の状態数. 0 なら支配による枝刈りをしない.
+        dedup(bool): 先頭位置が一致する状態をまとめるか
+        workers(int | None): 評価値を並列に計算するプロセス数
+    """
+
+    problem = Problem(util.as_instance(instance))
+    if problem.lengths.sum() == 0:
+        return ""
+
+    empty = np.zeros(1, dtype=np.int64)
+    beam = Beam(np.zeros((1, len(problem.lengths)), dtype=np.int64), empty, empty)
+    history: list[Beam] = []
+
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers is not None and workers > 1:
+            # 評価関数が参照する前計算を済ませてから渡す
+            scorer(problem, beam.positions, Layer(0, int(problem.lengths.max())))
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(problem,)
+                )
+            )
+
+        while True:
+            beam = expand(beam, problem.padded, problem.num_chars)
+            rests = problem.lengths - beam.positions
+            finished = np.flatnonzero((rests == 0).all(axis=1))
+            if len(finished) > 0:
+                history.append(beam)
+                return restore(history, int(finished[0]), problem.instance.chars)
+
+            if dedup:
+                beam = beam.select(unique(beam.positions))
+
+            layer = Layer(
+                len(history) + 1, int((problem.lengths - beam.positions).max())
+            )
+            if executor is None:
+                scores = scorer(problem, beam.positions, layer)
+            else:
+                scores = _score_parallel(
+                    executor, workers, scorer, beam.positions, layer
+                )
+
+            beam = beam.select(np.argsort(-scores, kind="stable"))
+            if kappa > 0:
+                beam = beam.select(np.flatnonzero(~dominated(beam.positions, kappa)))
+            beam = beam.select(np.arange(min(beta, len(beam))))
+            history.append(beam)
+
+
+def restore(history: list[Beam], index: int, chars: str) -> str:
+    """
+    最後のビームの `index` 番目の状態の解を親を辿って復元する.
+
+    Args:
+        history(list[Beam]): 各反復のビーム
+        index(int): 最後のビームにおける状態の添字
+        chars(str): アルファベット
+    """
+
+    codes = []
+    for beam in reversed(history):
+        codes.append(int(beam.codes[index]))
+        index = int(beam.parents[index])
+    return "".join(chars[c] for c in reversed(codes))
+
+
+_worker_problem: Problem | None = None
+
+
+def _init_worker(problem: Problem) -> None:
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _score_in_worker(scorer: Scorer, positions: np.ndarray, layer: Layer) -> np.ndarray:
+    assert _worker_problem is not None
+    return scorer(_worker_problem, positions, layer)
+
+
+def _score_parallel(
+    executor: concurrent.futures.Executor,
+    workers: int,
+    scorer: Scorer,
+    positions: np.ndarray,
+    layer: Layer,
+) -> np.ndarray:
+    chunks = np.array_split(positions, min(workers, len(positions)))
+    futures = [
+        executor.submit(_score_in_worker, scorer, chunk, layer) for chunk in chunks
+    ]
+    return np.concatenate([future.result() for future in futures])
+
+
+@dataclass
+class Model:
+    instance: list[str] | util.Instance
+    solution: str | None = None
+    best_bound: float = 0.0
+
+    def solve(
+        self,
+        beta: int = 100,
+        kappa: int = 7,
+        scorer: str | Scorer = "probability",
+        dedup: bool = True,
+        *args,
+        workers: int | None = None,
+        **kwargs,
+    ) -> str | None:
+        if isinstance(scorer, str):
+            scorer = SCORERS[scorer]
+        self.solution = search(self.instance, scorer, beta, kappa, dedup, workers)
+        return self.solution
@@ -4,6 +4,43 @@
 
 from dataclasses import dataclass
 
+import numpy as np
+
+from ... import util
+
+
+def scs2_codes(codes1: np.ndarray, codes2: np.ndarray) -> np.ndarray:
+    """
+    2 つの文字列の shortest common supersequence の 1 つを添字の配列で返す.
+
+    接尾辞同士の SCS 長テーブル `util.tables.scs2_pair` を計算し, 先頭から辿って復元する.
+    テーブルの行ごとの計算はベクトル化されているので, 短い方を `codes1` に渡すとよい.
+
+    Args:
+        codes1(np.ndarray): 1 つ目の文字列の添字の配列
+        codes2(np.ndarray): 2 つ目の文字列の添字の配列
+    """
+
+    table = util.tables.scs2_pair(codes1, codes2)
+    len1, len2 = len(codes1), len(codes2)
+    s1, s2 = codes1.tolist(), codes2.tolist()
+
+    solution = []
+    i1, i2 = 0, 0
+    while i1 < len1 and i2 < len2:
+        if s1[i1] == s2[i2]:
+            solution.append(s1[i1])
+            i1, i2 = i1 + 1, i2 + 1
+        elif table[i1 + 1, i2] <= table[i1, i2 + 1]:
+            solution.append(s1[i1])
+            i1 += 1
+        else:
+            solution.append(s2[i2])
+            i2 += 1
+    solution += s1[i1:] + s2[i2:]
+
+    return np.array(solution, dtype=np.result_type(codes1, codes2))
+
 
 def scs2(s1: str, s2: str) -> str:
     """
@@ -14,39 +51,29 @@ def scs2(s1: str, s2: str) -> str:
         s2(str): 文字列 2
     """
 
-    len1, len2 = len(s1), len(s2)
-
-    dp = [["" for _ in range(len2 + 1)] for _ in range(len1 + 1)]
-
-    for idx1 in range(len1 + 1):
-        for idx2 in range(len2 + 1):
-            if idx1 == 0:
-                dp[idx1][idx2] = s2[:idx2]
-            elif idx2 == 0:
-                dp[idx1][idx2] = s1[:idx1]
-            elif s1[idx1 - 1] == s2[idx2 - 1]:
-                dp[idx1][idx2] = dp[idx1 - 1][idx2 - 1] + s1[idx1 - 1]
-            else:
-                if len(dp[idx1 - 1][idx2]) <= len(dp[idx1][idx2 - 2]):
-                    dp[idx1][idx2] = dp[idx1 - 1][idx2] + s1[idx1 - 1]
-                else:
-                    dp[idx1][idx2] = dp[idx1][idx2 - 1] + s2[idx2 - 1]
-
-    return dp[-1][-1]
+    chars = util.instance.alphabet([s1, s2])
+    codes = scs2_codes(
+        util.instance.encode(s1, chars, len(chars)),
+        util.instance.encode(s2, chars, len(chars)),
+    )
+    return "".join(chars[c] for c in codes.tolist())
 
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
     def solve(self, *args, **kwargs) -> str | None:
-        instance_sorted = sorted(self.instance, key=lambda s: len(s), reverse=True)
+        instance = util.as_instance(self.instance)
+        lengths = instance.lengths.tolist()
+        order = sorted(range(len(instance)), key=lambda i: lengths[i], reverse=True)
 
-        solution = instance_sorted[0]
-        for s in instance_sorted[1:]:
-            solution = scs2(solution, s)
+        # 解は添字の配列のまま持ち, 最後に 1 度だけ文字列に戻す
+        solution = instance.code(order[0])
+        for i in order[1:]:
+            solution = scs2_codes(instance.code(i), solution)
 
-        self.solution = solution
+        self.solution = "".join(np.array(list(instance.chars))[solution].tolist())
         return self.solution
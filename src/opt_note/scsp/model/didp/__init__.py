@@ -3,10 +3,12 @@
 """
 
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import didppy
 
+from ... import util
+
 type TypeBoundExprFunc = Callable[
     # pyrefly: ignore # ty: ignore
     [list[str], didppy.Model, list[didppy.ElementVar]], didppy.IntExpr
@@ -14,36 +16,37 @@ type TypeBoundExprFunc = Callable[
 
 
 def boundtable_scs2(s1: str, s2: str) -> list[list[int]]:
-    len1, len2 = len(s1), len(s2)
-
-    dp = [[len1 + len2 for _ in range(len2 + 1)] for _ in range(len1 + 1)]
+    """
+    `s1[i1:]` と `s2[i2:]` の SCS 長を `[i1][i2]` に持つテーブルを返す.
 
-    for i1 in range(len1 + 1):
-        dp[i1][len2] = len1 - i1
-    for i2 in range(len2 + 1):
-        dp[len1][i2] = len2 - i2
+    `util.tables.scs2_pair` で計算する.
+    """
 
-    for i1 in range(len1 - 1, -1, -1):
-        for i2 in range(len2 - 1, -1, -1):
-            if s1[i1] == s2[i2]:
-                dp[i1][i2] = dp[i1 + 1][i2 + 1] + 1
-            else:
-                dp[i1][i2] = min(dp[i1 + 1][i2], dp[i1][i2 + 1]) + 1
-
-    return dp
+    chars = util.instance.alphabet([s1, s2])
+    return util.tables.scs2_pair(
+        util.instance.encode(s1, chars, len(chars)),
+        util.instance.encode(s2, chars, len(chars)),
+    ).tolist()
 
 
 def boundexpr_scs2len(
-    instance: list[str],
+    instance: list[str] | util.Instance,
     dpmodel: didppy.Model,  # pyrefly: ignore # ty:ignore
     index_vars: list[didppy.ElementVar],  # pyrefly: ignore # ty:ignore
 ) -> didppy.IntExpr:  # pyrefly: ignore # ty: ignore
+    # Instance であれば前計算テーブル (util.tables) を使う
+    encoded = instance if isinstance(instance, util.Instance) else None
+
     exprs = []
     for idx1, (s1, index_var1) in enumerate(zip(instance, index_vars)):
         for idx2, (s2, index_var2) in enumerate(zip(instance, index_vars)):
             if idx2 >= idx1:
                 continue
-            table_idx1_idx2 = dpmodel.add_int_table(boundtable_scs2(s1, s2))
+            if encoded is not None:
+                table = util.tables.scs2_table(encoded, idx1, idx2).tolist()
+            else:
+                table = boundtable_scs2(s1, s2)
+            table_idx1_idx2 = dpmodel.add_int_table(table)
             exprs.append(table_idx1_idx2[index_var1, index_var2])
 
     bound = didppy.IntExpr(0)  # pyrefly: ignore # ty: ignore
@@ -55,9 +58,10 @@ def boundexpr_scs2len(
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
 
     def solve(
         self,
@@ -66,9 +70,13 @@ class Model:
         extra_bounds: list[TypeBoundExprFunc] | None = None,
         disable_default_bound: bool = False,
         *args,
+        on_progress: util.progress.ProgressCallback | None = None,
         **kwargs,
     ) -> str | None:
-        chars = sorted(set("".join(self.instance)))
+        timer = util.PhaseTimer()
+
+        instance = util.as_instance(self.instance)
+        chars = instance.chars
 
         # pyrefly: ignore # ty:ignore
         dpmodel = didppy.Model(maximize=False, float_cost=False)
@@ -82,7 +90,7 @@ class Model:
         ]
 
         instance_table = dpmodel.add_element_table(
-            [[chars.index(c) for c in s] + [len(chars)] for s in self.instance]
+            [s + [len(chars)] for s in instance.code_lists()]
         )
 
         dpmodel.add_base_case(
@@ -113,9 +121,7 @@ class Model:
 
         # 残っている文字列から 2 つを選んで SCS を取って長さが最大のものを Dual Bound とする.
         if not disable_default_bound:
-            dpmodel.add_dual_bound(
-                boundexpr_scs2len(self.instance, dpmodel, index_vars)
-            )
+            dpmodel.add_dual_bound(boundexpr_scs2len(instance, dpmodel, index_vars))
 
         # 追加の Dual Bound があれば.
         if extra_bounds:
@@ -125,7 +131,14 @@ class Model:
         dpsolver = didppy.CABS(  # pyrefly: ignore # ty: ignore
             dpmodel, threads=12, time_limit=time_limit, quiet=(not log)
         )
-        didpsolution = dpsolver.search()
+        timer.lap("build")
+        if on_progress is None:
+            didpsolution = dpsolver.search()
+        else:
+            didpsolution = util.progress.search_didp(
+                dpsolver, util.progress.Reporter(on_progress)
+            )
+        timer.lap("solve")
 
         if not didpsolution.is_infeasible and len(didpsolution.transitions) > 0:
             self.solution = "".join([trans.name for trans in didpsolution.transitions])
@@ -137,4 +150,6 @@ class Model:
         else:
             self.best_bound = 0.0
 
+        timer.lap("extract")
+        self.phase_times = timer.times
         return self.solution
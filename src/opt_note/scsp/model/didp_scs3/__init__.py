@@ -2,10 +2,11 @@
 .. include:: ./README.md
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import didppy
 
+from ... import util
 from ..didp import Model as ModelDidp
 
 
@@ -84,12 +85,18 @@ def boundexpr_scs3len(
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
         model = ModelDidp(self.instance)
         model.solve(
@@ -97,7 +104,9 @@ class Model:
             log,
             extra_bounds=[boundexpr_scs3len],
             disable_default_bound=True,
+            on_progress=on_progress,
         )
         self.best_bound = model.best_bound
         self.solution = model.solution
+        self.phase_times = model.phase_times
         return self.solution
@@ -2,60 +2,719 @@
 .. include:: ./README.md
 """
 
-import itertools
-from dataclasses import dataclass
+import concurrent.futures
+import math
+import multiprocessing.shared_memory
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+
+from ... import util
+from .. import wmm
+
+CHUNK = 1 << 12
+"""
+A* 探索で一度にまとめて展開する状態数の上限.
+"""
+
+PARALLEL_CHUNK = 1 << 14
+"""
+`lattice_solution` でプロセスプールに渡す transversal の数の下限.
+"""
+
+BLOCK_LIMIT = 1 << 62
+"""
+`Lattice` で 1 つの int64 にまとめる桁の基数の積の上限.
+"""
+
+LAYER_CHUNK = 1 << 16
+"""
+`Lattice.layers` で一度に次の層の候補を作る transversal の数.
+"""
+
+
+class Lattice:
+    """
+    transversal の mixed-radix 整数による表現.
+
+    `i` 番目の桁の基数を `len(s_i) + 1` とし, transversal `t` を `sum(t[i] * strides[i])` で表す.
+    基数の積 `size` が int64 に収まらない場合は, 収まる桁のまとまりごとに int64 で計算して Python の整数に合成する.
+
+    Args:
+        lengths(np.ndarray): 各文字列の長さ
+    """
+
+    def __init__(self, lengths: np.ndarray):
+        self.radices = lengths.astype(np.int64) + 1
+        self.size = math.prod(self.radices.tolist())
+
+        # blocks: (開始桁, 終了桁, まとまり内の各桁の重み, まとまりの最下位の重み, まとまりの基数の積)
+        self.blocks: list[tuple[int, int, np.ndarray, int, int]] = []
+        begin, product, weight = 0, 1, 1
+        for i, radix in enumerate(self.radices.tolist()):
+            if product * radix >= BLOCK_LIMIT:
+                self._add_block(begin, i, weight, product)
+                begin, product, weight = i, 1, weight * product
+            product *= radix
+        self._add_block(begin, len(self.radices), weight, product)
+
+    def _add_block(self, begin: int, end: int, weight: int, product: int) -> None:
+        radices = self.radices[begin:end]
+        local = np.cumprod(np.r_[1, radices])[: end - begin].astype(np.int64)
+        self.blocks.append((begin, end, local, weight, product))
+
+    @property
+    def fits(self) -> bool:
+        """
+        全ての transversal が int64 で表せるか.
+        """
+
+        return len(self.blocks) == 1
+
+    @property
+    def strides(self) -> np.ndarray:
+        """
+        各桁の重み. `fits` の場合のみ使える.
+        """
+
+        if not self.fits:
+            raise ValueError("transversal の数が int64 で表せる範囲を超えています.")
+        return self.blocks[0][2]
+
+    def encode(self, transversals: np.ndarray) -> np.ndarray:
+        """
+        `(状態数, n)` 型の transversal の配列を整数の配列に変換する.
+        `fits` なら int64 型, そうでなければ Python の整数からなる object 型の配列を返す.
+        """
+
+        if self.fits:
+            return transversals @ self.strides
+
+        keys = np.zeros(len(transversals), dtype=object)
+        for begin, end, local, weight, _ in self.blocks:
+            keys += (transversals[:, begin:end] @ local).astype(object) * weight
+        return keys
+
+    def decode(self, keys: np.ndarray | list[int]) -> np.ndarray:
+        """
+        `encode` の逆変換.
+        """
+
+        keys = np.asarray(keys, dtype=np.int64 if self.fits else object)
+        transversals = np.empty((len(keys), len(self.radices)), dtype=np.int64)
+        for begin, end, local, weight, product in self.blocks:
+            part = ((keys // weight) % product).astype(np.int64)
+            transversals[:, begin:end] = (part[:, None] // local) % self.radices[
+                begin:end
+            ]
+        return transversals
+
+    def layers(self, limit: float = float("inf")) -> Iterator[np.ndarray]:
+        """
+        各桁の和 (接頭辞の長さの和) が `0, 1, 2, ...` の transversal の整数表現を,
+        和ごとにソート済みの int64 配列として順に返す. `fits` の場合のみ使える.
+
+        次の層は `LAYER_CHUNK` 個ずつ作り, その間に時刻 `limit` (`time.monotonic`) を過ぎたら
+        残りの層を返さずに終了する.
+        """
+
+        strides = self.strides
+        layer = np.zeros(1, dtype=np.int64)
+        while len(layer) > 0:
+            yield layer
+            candidates = []
+            for begin in range(0, len(layer), LAYER_CHUNK):
+                if time.monotonic() >= limit:
+                    return
+                part = layer[begin : begin + LAYER_CHUNK]
+                movable = self.decode(part) < self.radices - 1
+                candidates.append((part[:, None] + strides)[movable])
+            layer = np.unique(np.concatenate(candidates))
+
+
+class Heuristic:
+    """
+    transversal から right transversal までの距離 (残りの文字列の SCS 長) の下界.
+
+    以下の最大値を取る. いずれも 1 文字進めると高々 1 しか減らないので, A* 探索で consistent な下界となる.
+
+    - 残りの文字列の長さの最大値
+    - 残りの文字列の全ての組の SCS 長の最大値 (`util.tables.scs2_pair`)
+    - 残りの文字列の各文字の出現回数の最大値の和
+
+    Args:
+        instance(util.Instance): 問題インスタンス
+    """
+
+    def __init__(self, instance: util.Instance):
+        n, q = len(instance), len(instance.chars)
+        self.lengths = instance.lengths
+
+        # pairs[i, j]: 組の番号. flat[starts[pair] + t_i * widths[pair] + t_j] が SCS 長.
+        util.tables.compute(instance, ("scs2",))
+        self.first, self.second = np.tril_indices(n, -1)
+        self.flat = instance.tables["scs2"]
+        self.starts = instance.tables["scs2_index"][:-1]
+        self.widths = self.lengths[self.second] + 1
+
+        # suffix_counts[i, t, c]: i 番目の文字列の t 文字目以降に文字 c が現れる回数
+        padded = instance.padded(q)
+        onehot = np.zeros((n, padded.shape[1] + 1, q + 1), dtype=np.int32)
+        np.put_along_axis(onehot[:, :-1], padded[:, :, None], 1, axis=2)
+        self.suffix_counts = np.cumsum(onehot[:, ::-1, :q], axis=1)[:, ::-1]
+
+    def __call__(self, transversals: np.ndarray) -> np.ndarray:
+        """
+        `(状態数, n)` 型の transversal の配列に対して下界の配列を返す.
+        """
+
+        bound = (self.lengths - transversals).max(axis=1)
+        if len(self.first) > 0:
+            pair = self.flat[
+                self.starts
+                + transversals[:, self.first] * self.widths
+                + transversals[:, self.second]
+            ]
+            bound = np.maximum(bound, pair.max(axis=1))
+        counts = self.suffix_counts[np.arange(len(self.lengths)), transversals]
+        return np.maximum(bound, counts.max(axis=1).sum(axis=1))
+
+
+def lattice_solution(
+    instance: list[str] | util.Instance,
+    time_limit: int | None = None,
+    workers: int | None = None,
+) -> str | None:
+    """
+    全ての transversal の SCS 長を接頭辞の長さの和の昇順に計算し, 最適解を 1 つ返す.
+
+    SCS 長は `uint16` 型 (文字列長の和が収まらなければ `uint32`), 最後に追加した文字は `uint8` (文字種数が 256 を超えれば `uint16`) 型の
+    長さ `Lattice.size` の配列に `Lattice` の整数表現を添字として格納する.
+    計算時間上限に達した場合は None を返す.
+
+    同じ層の transversal は前の層までの値だけから計算できる.
+    `workers` に 2 以上を指定すると, 2 つの配列を共有メモリに置き,
+    `PARALLEL_CHUNK` 個以上の transversal からなる層を分割してプロセスプールで計算する.
+
+    Args:
+        instance(list[str] | util.Instance): 問題インスタンス
+        time_limit(int | None): 計算時間上限
+        workers(int | None): 並列に計算するプロセス数
+    """
+
+    limit = time.monotonic() + (time_limit if time_limit is not None else float("inf"))
+    return _lattice_solution(util.as_instance(instance), limit, workers)
+
+
+def _lattice_solution(
+    instance: util.Instance, limit: float, workers: int | None
+) -> str | None:
+    lattice = Lattice(instance.lengths)
+    q = len(instance.chars)
+    lasts = _last_chars(instance)
+    strides = lattice.strides
+    dtypes = (_length_dtype(instance), np.dtype(np.uint8 if q <= 1 << 8 else np.uint16))
+
+    memories: list[multiprocessing.shared_memory.SharedMemory] = []
+    executor: concurrent.futures.ProcessPoolExecutor | None = None
+    try:
+        if workers is not None and workers > 1:
+            memories = [
+                multiprocessing.shared_memory.SharedMemory(
+                    create=True, size=max(1, lattice.size * dtype.itemsize)
+                )
+                for dtype in dtypes
+            ]
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(
+                    instance.lengths,
+                    lasts,
+                    q,
+                    [memory.name for memory in memories],
+                    dtypes,
+                ),
+            )
+            lengths, chars = (
+                np.ndarray(lattice.size, dtype=dtype, buffer=memory.buf)
+                for dtype, memory in zip(dtypes, memories)
+            )
+            lengths[0] = 0
+        else:
+            lengths, chars = (np.zeros(lattice.size, dtype=dtype) for dtype in dtypes)
+
+        layer = np.zeros(1, dtype=np.int64)
+        for layer in lattice.layers(limit):
+            if time.monotonic() >= limit:
+                return None
+            if layer[0] == 0:
+                continue
+            if executor is None or len(layer) < PARALLEL_CHUNK:
+                _relax_into(lattice, lasts, layer, q, lengths, chars)
+                continue
+            size = max(PARALLEL_CHUNK, -(-len(layer) // (workers or 1)))
+            futures = [
+                executor.submit(_relax_in_worker, layer[begin : begin + size])
+                for begin in range(0, len(layer), size)
+            ]
+            for future in futures:
+                future.result()
+        if layer[-1] != lattice.size - 1:
+            # 層の生成中に計算時間上限に達した
+            return None
+
+        # right transversal から最後に追加した文字を辿る
+        codes = []
+        key = lattice.size - 1
+        while key > 0:
+            c = int(chars[key])
+            transversal = lattice.decode([key])[0]
+            codes.append(c)
+            key -= int((lasts[np.arange(len(instance)), transversal] == c) @ strides)
+        return "".join(instance.chars[c] for c in reversed(codes))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        lengths = chars = None
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+
+def lattice_length(instance: list[str] | util.Instance) -> int:
+    """
+    `lattice_solution` と同じ順に SCS 長だけを計算して最適値を返す.
+
+    1 回の遷移で接頭辞の長さの和は `1` 以上 `n` 以下減るので, 直近の `n` 個の和の transversal の SCS 長だけを保持する.
+
+    Args:
+        instance(list[str] | util.Instance): 問題インスタンス
+    """
+
+    window = _sweep(util.as_instance(instance))
+    assert window is not None
+    return int(window[-1][1][0])
+
+
+def lattice_hirschberg(
+    instance: list[str] | util.Instance,
+    max_states: int = 1 << 24,
+    workers: int | None = None,
+    time_limit: int | None = None,
+) -> str | None:
+    """
+    `lattice_length` と同じく直近の層だけを保持しながら, 分割統治で最適解を 1 つ復元する.
+
+    接頭辞の長さの和の合計を `total` とし, 和が `depth` 以上 `depth + n` 未満の層を考える.
+    1 回の遷移で和は高々 `n` しか増えないので, 任意の解はこれらの層のいずれかの transversal `t` を通る.
+    left transversal から `t` までの SCS 長と, 各文字列を反転したインスタンスでの `t` から right transversal までの SCS 長を
+    それぞれ `depth + n - 1` 層目, `total - depth` 層目まで計算し, 和が最小の `t` で接頭辞と接尾辞のインスタンスに分けて再帰的に解く.
+    `depth` は `total` の半分とする.
+
+    状態数が `max_states` 以下になったら `lattice_solution` で解く.
+    保持する状態数と 1 層の計算に使う作業領域はいずれも最も大きい層の transversal の数の `n` 倍程度なので,
+    これが `max_states` を超える場合は計算せずに None を返す.
+    `workers` に 2 以上を指定すると, 前向きと後ろ向きの計算を 2 つのプロセスで同時に行い,
+    `lattice_solution` にも `workers` を渡す.
+
+    計算時間上限に達した場合は None を返す. 計算時間上限は層を作る途中でも確認する.
+    transversal の数が int64 で表せない場合は `ValueError` を送出する.
+
+    Args:
+        instance(list[str] | util.Instance): 問題インスタンス
+        max_states(int): `lattice_solution` で解く状態数と, 保持する状態数の上限
+        workers(int | None): 並列に計算するプロセス数
+        time_limit(int | None): 計算時間上限
+    """
+
+    limit = time.monotonic() + (time_limit if time_limit is not None else float("inf"))
+    strings = list(instance)
+    if not Lattice(util.as_instance(strings).lengths).fits:
+        raise ValueError("transversal の数が int64 で表せる範囲を超えています.")
+
+    if workers is None or workers <= 1:
+        return _hirschberg(strings, max_states, None, workers, limit)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        return _hirschberg(strings, max_states, executor, workers, limit)
+
+
+def _hirschberg(
+    strings: list[str],
+    max_states: int,
+    executor: concurrent.futures.ProcessPoolExecutor | None,
+    workers: int | None,
+    limit: float,
+) -> str | None:
+    strings = [s for s in strings if len(s) > 0]
+    if len(strings) == 0:
+        return ""
+
+    instance = util.as_instance(strings)
+    lattice = Lattice(instance.lengths)
+    n, total = len(strings), int(instance.lengths.sum())
+    if lattice.size <= max_states:
+        return _lattice_solution(instance, limit, workers)
+    # 直近の n 層と 1 層分の作業領域はいずれも最も大きい層の n 倍程度の状態数になる
+    if total <= n or _layer_sizes(instance.lengths).max() * n > max_states:
+        return None
+
+    # 和が depth 以上 depth + n 未満の層は left transversal と right transversal を含まない
+    depth = min(total // 2, total - n)
+    reverse = util.as_instance([s[::-1] for s in strings])
+    if executor is None:
+        forward = _sweep(instance, depth + n - 1, limit)
+        backward = _sweep(reverse, total - depth, limit)
+    else:
+        futures = [
+            executor.submit(_sweep, instance, depth + n - 1, limit),
+            executor.submit(_sweep, reverse, total - depth, limit),
+        ]
+        forward, backward = (future.result() for future in futures)
+    if forward is None or backward is None:
+        return None
+
+    # 反転したインスタンスの transversal は lengths - t で, 整数表現は size - 1 - key となる
+    forward_keys = np.concatenate([keys for keys, _ in forward])
+    backward_keys = lattice.size - 1 - np.concatenate([keys for keys, _ in backward])
+    forward_order, backward_order = np.argsort(forward_keys), np.argsort(backward_keys)
+    assert np.array_equal(forward_keys[forward_order], backward_keys[backward_order])
+    costs = (
+        np.concatenate([values for _, values in forward])[forward_order].astype(
+            np.int64
+        )
+        + np.concatenate([values for _, values in backward])[backward_order]
+    )
+    key = forward_keys[forward_order][np.argmin(costs)]
+    cut = lattice.decode([key])[0].tolist()
+
+    prefix = _hirschberg(
+        [s[:t] for s, t in zip(strings, cut)], max_states, executor, workers, limit
+    )
+    if prefix is None:
+        return None
+    suffix = _hirschberg(
+        [s[t:] for s, t in zip(strings, cut)], max_states, executor, workers, limit
+    )
+    if suffix is None:
+        return None
+    return prefix + suffix
 
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
 
-    def solve(self, *args, **kwargs) -> str | None:
-        dp: dict[tuple[int, ...], tuple[int, tuple[int, ...] | None]] = {
-            (0,) * len(self.instance): (0, None)
-        }
-        for transversal in itertools.product(
-            *[range(len(s) + 1) for s in self.instance]
-        ):
-            if transversal in dp:
-                continue
+    def solve(
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        upper_bound: str | None = None,
+        method: Literal["astar", "lattice", "hirschberg"] = "astar",
+        max_states: int | None = 5_000_000,
+        workers: int | None = None,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
+    ) -> str | None:
+        """
+        left transversal から right transversal への最短路を A* 探索で求める.
+        状態は `Lattice` の整数表現で持つ.
+
+        暫定解より短い解を与えない状態は展開しない.
+        計算時間上限または状態数の上限に達した場合は暫定解を返し, `best_bound` にはその時点の下界を入れる.
+
+        `method` が `"lattice"` なら `lattice_solution` で全ての transversal を調べる.
+        このとき transversal の数が `max_states` を超える場合や計算時間上限に達した場合は暫定解を返す.
+        `"hirschberg"` なら `lattice_hirschberg` で直近の層だけを保持して調べる.
+        このとき transversal の数が int64 で表せない場合, 最も大きい層の transversal の数の `n` 倍が `max_states` を超える場合や
+        計算時間上限に達した場合は暫定解を返す.
+        いずれも暫定解を返す場合の `best_bound` は left transversal での `Heuristic` の値とする.
 
-            end_chars = {s[t - 1] for s, t in zip(self.instance, transversal) if t > 0}
-            pretransversals = [
-                tuple(
-                    t - 1 if t > 0 and s[t - 1] == c else t
-                    for s, t in zip(self.instance, transversal)
+        Args:
+            time_limit(int | None): 計算時間上限
+            log(bool): 下界が更新されるたびに出力するか
+            upper_bound(str | None): 暫定解とする共通超配列. 指定しなければ `wmm` の解を使う.
+            method(Literal["astar", "lattice", "hirschberg"]): 解法
+            max_states(int | None): 保持する状態数の上限. 超えたら計算時間上限に達したときと同様に打ち切る.
+            workers(int | None): `"lattice"`, `"hirschberg"` で並列に計算するプロセス数
+            on_progress(util.progress.ProgressCallback | None): 進捗通知のコールバック
+        """
+
+        timer = util.PhaseTimer()
+        reporter = util.progress.Reporter(on_progress) if on_progress else None
+        start = time.monotonic()
+        limit = start + (time_limit if time_limit is not None else float("inf"))
+
+        instance = util.as_instance(self.instance)
+        n, q = len(instance), len(instance.chars)
+
+        def initial() -> str:
+            solution = (
+                upper_bound if upper_bound is not None else wmm.Model(instance).solve()
+            )
+            assert solution is not None
+            return solution
+
+        if method in ("lattice", "hirschberg"):
+            # 整数表現や配列に収まらない大きさであれば調べずに暫定解を返す
+            lattice = Lattice(instance.lengths)
+            solution = None
+            if method == "lattice" and (
+                lattice.fits and (max_states is None or lattice.size <= max_states)
+            ):
+                solution = lattice_solution(instance, time_limit, workers)
+            elif method == "hirschberg" and lattice.fits:
+                solution = lattice_hirschberg(
+                    instance,
+                    max_states if max_states is not None else 1 << 24,
+                    workers,
+                    time_limit,
                 )
-                for c in end_chars
-            ]
+            timer.lap("solve")
+
+            if solution is not None:
+                self.solution = solution
+                self.best_bound = float(len(solution))
+            else:
+                self.solution = initial()
+                root = np.zeros((1, n), dtype=np.int64)
+                self.best_bound = float(Heuristic(instance)(root)[0])
+            if reporter is not None:
+                reporter(primal=len(self.solution), dual=self.best_bound)
+            self.phase_times = timer.times
+            return self.solution
+
+        incumbent = initial()
 
-            min_transversal = pretransversals[0]
-            min_length = dp[min_transversal][0]
-            for pretransversal in pretransversals:
-                if dp[pretransversal][0] < min_length:
-                    min_transversal = pretransversal
-                    min_length = dp[pretransversal][0]
-
-            dp[transversal] = (min_length + 1, min_transversal)
-
-        solution: str = ""
-        left_transversal: tuple[int, ...] = (0,) * len(self.instance)
-        right_transversal: tuple[int, ...] = tuple(len(s) for s in self.instance)
-        current_transversal = right_transversal
-        while current_transversal != left_transversal:
-            pretransversal = dp[current_transversal][1]
-            assert pretransversal is not None
-            c = None
-            for s, t1, t2 in zip(self.instance, current_transversal, pretransversal):
-                if t1 == t2 + 1:
-                    c = s[t2]
+        # heads[i, t]: i 番目の文字列の t 文字目. 末尾は q.
+        padded = instance.padded(q)
+        heads = np.full((n, padded.shape[1] + 1), q, dtype=np.int64)
+        heads[:, :-1] = padded
+        heuristic = Heuristic(instance)
+        lattice = Lattice(instance.lengths)
+        rows = np.arange(n)
+        timer.lap("build")
+
+        root, goal = 0, lattice.size - 1
+        # nodes[key]: 親の整数表現 * radix + 距離. 距離は暫定解の長さ未満.
+        radix = len(incumbent) + 1
+        nodes: dict[int, int] = {root: 0}
+
+        # buckets[f][g]: 評価値 f = g + h, 距離 g の状態のリスト.
+        # h は consistent なので f の昇順に取り出せばよく, 同じ f の中では g の大きい方から展開する.
+        lower = int(heuristic(np.zeros((1, n), dtype=np.int64))[0])
+        buckets: dict[int, dict[int, list[int]]] = {lower: {0: [root]}}
+        found = False
+        expanded = 0
+        while lower < len(incumbent) and not found:
+            if log:
+                print(f"lower bound: {lower}, expanded: {expanded}")
+            if reporter is not None and reporter(dual=lower, primal=len(incumbent)):
+                break
+
+            layer = buckets.pop(lower, {})
+            while layer:
+                # 計算時間上限を確認できるよう, 一度に展開する状態数を抑える
+                cost = max(layer)
+                pending = layer[cost]
+                batch = [
+                    state for state in pending[-CHUNK:] if nodes[state] % radix == cost
+                ]
+                del pending[-CHUNK:]
+                if len(pending) == 0:
+                    del layer[cost]
+                if goal in batch:
+                    found = True
+                    break
+                if len(batch) == 0:
+                    continue
+                expanded += len(batch)
+
+                # 各状態について, 残りの文字列の先頭に現れる文字ごとに子を作る
+                states = lattice.decode(batch)
+                fronts = heads[rows, states]
+                appears = np.zeros((len(batch), q + 1), dtype=np.bool_)
+                appears[np.arange(len(batch))[:, None], fronts] = True
+                owners, chars = np.nonzero(appears[:, :q])
+                children = states[owners] + (fronts[owners] == chars[:, None])
+                bounds = heuristic(children) + cost + 1
+
+                for owner, child, bound in zip(
+                    owners.tolist(),
+                    lattice.encode(children).tolist(),
+                    bounds.tolist(),
+                ):
+                    if (
+                        bound >= len(incumbent)
+                        or nodes.get(child, radix - 1) % radix <= cost + 1
+                    ):
+                        continue
+                    nodes[child] = batch[owner] * radix + cost + 1
+                    target = layer if bound == lower else buckets.setdefault(bound, {})
+                    target.setdefault(cost + 1, []).append(child)
+
+                if time.monotonic() >= limit or (
+                    max_states is not None and len(nodes) > max_states
+                ):
                     break
-            assert c is not None
-            solution += c
-            current_transversal = pretransversal
+            else:
+                lower += 1
+                continue
+            break
 
-        self.solution = solution[::-1]
-        self.best_bound = float(len(self.solution))
+        timer.lap("solve")
+
+        if found:
+            # 経路上の隣り合う transversal で最初に進んだ文字列の文字を並べる
+            path = [goal]
+            while path[-1] != root:
+                path.append(nodes[path[-1]] // radix)
+            transversals = lattice.decode(path[::-1])
+            moved = np.argmax(transversals[1:] > transversals[:-1], axis=1)
+            codes = heads[moved, transversals[:-1][np.arange(len(moved)), moved]]
+            incumbent = "".join(instance.chars[c] for c in codes.tolist())
+            lower = len(incumbent)
+        elif lower >= len(incumbent):
+            # 暫定解より短い解が存在しないことが確定した
+            lower = len(incumbent)
+
+        self.solution = incumbent
+        self.best_bound = float(lower)
+        if reporter is not None:
+            reporter(primal=len(self.solution), dual=self.best_bound)
+        timer.lap("extract")
+        self.phase_times = timer.times
         return self.solution
+
+
+def _layer_sizes(lengths: np.ndarray) -> np.ndarray:
+    # sizes[d]: 接頭辞の長さの和が d の transversal の数. 大きさの見積もりに使うので float64 で持つ.
+    sizes = np.ones(1)
+    for length in lengths.tolist():
+        sums = np.cumsum(np.r_[sizes, np.zeros(length)])
+        sums[length + 1 :] -= sums[: -length - 1].copy()
+        sizes = sums
+    return sizes
+
+
+def _length_dtype(instance: util.Instance) -> np.dtype:
+    # SCS 長は文字列長の和以下
+    total = int(instance.lengths.sum())
+    return np.dtype(np.uint16 if total <= np.iinfo(np.uint16).max else np.uint32)
+
+
+def _last_chars(instance: util.Instance) -> np.ndarray:
+    # lasts[i, t]: i 番目の文字列の t - 1 文字目. t = 0 では q.
+    q = len(instance.chars)
+    padded = instance.padded(q)
+    lasts = np.full((len(instance), padded.shape[1] + 1), q, dtype=np.int64)
+    lasts[:, 1:] = padded
+    return lasts
+
+
+def _relax(
+    lattice: Lattice,
+    lasts: np.ndarray,
+    layer: np.ndarray,
+    q: int,
+    lookup: Callable[[np.ndarray], np.ndarray],
+) -> tuple[np.ndarray, np.ndarray]:
+    # 最後の文字 c ごとに, c で終わる接頭辞を全て 1 文字短くした transversal の SCS 長 + 1 の最小値を取る
+    transversals = lattice.decode(layer)
+    ends = lasts[np.arange(len(lattice.radices)), transversals]
+    best = np.full(len(layer), np.iinfo(np.int64).max, dtype=np.int64)
+    best_chars = np.zeros(len(layer), dtype=np.int64)
+    for c in np.unique(ends[ends < q]).tolist():
+        mask = ends == c
+        rows = np.flatnonzero(mask.any(axis=1))
+        candidate = lookup(layer[rows] - mask[rows] @ lattice.strides).astype(np.int64)
+        better = candidate + 1 < best[rows]
+        best[rows[better]] = candidate[better] + 1
+        best_chars[rows[better]] = c
+    return best, best_chars
+
+
+def _relax_into(
+    lattice: Lattice,
+    lasts: np.ndarray,
+    layer: np.ndarray,
+    q: int,
+    lengths: np.ndarray,
+    chars: np.ndarray,
+) -> None:
+    best, best_chars = _relax(lattice, lasts, layer, q, lambda p: lengths[p])
+    lengths[layer] = best
+    chars[layer] = best_chars
+
+
+def _sweep(
+    instance: util.Instance,
+    depth: int | None = None,
+    limit: float = float("inf"),
+) -> list[tuple[np.ndarray, np.ndarray]] | None:
+    # 接頭辞の長さの和が depth 以下の層を順に計算し, 直近の n 層の (整数表現, SCS 長) を返す.
+    # 時刻 limit (time.monotonic) を過ぎたら None を返す.
+    lattice = Lattice(instance.lengths)
+    q = len(instance.chars)
+    lasts = _last_chars(instance)
+    last = int(instance.lengths.sum()) if depth is None else depth
+
+    window: list[tuple[np.ndarray, np.ndarray]] = []
+    dtype = _length_dtype(instance)
+    best = np.zeros(1, dtype=dtype)
+    for d, layer in enumerate(lattice.layers(limit)):
+        if time.monotonic() >= limit:
+            return None
+        if d > 0:
+            keys = np.concatenate([keys for keys, _ in window])
+            values = np.concatenate([values for _, values in window])
+            order = np.argsort(keys)
+            keys, values = keys[order], values[order]
+            best, _ = _relax(
+                lattice,
+                lasts,
+                layer,
+                q,
+                lambda p, keys=keys, values=values: values[np.searchsorted(keys, p)],
+            )
+        window = [*window, (layer, best.astype(dtype))][-len(instance) :]
+        if d == last:
+            return window
+    # 層の生成中に計算時間上限に達した
+    return None
+
+
+_worker_state: tuple | None = None
+
+
+def _init_worker(
+    lengths: np.ndarray,
+    lasts: np.ndarray,
+    q: int,
+    names: list[str],
+    dtypes: tuple[np.dtype, np.dtype],
+) -> None:
+    global _worker_state
+    lattice = Lattice(lengths)
+    memories = [
+        multiprocessing.shared_memory.SharedMemory(name=name, track=False)
+        for name in names
+    ]
+    tables = [
+        np.ndarray(lattice.size, dtype=dtype, buffer=memory.buf)
+        for dtype, memory in zip(dtypes, memories)
+    ]
+    _worker_state = (lattice, lasts, q, *tables, memories)
+
+
+def _relax_in_worker(layer: np.ndarray) -> None:
+    assert _worker_state is not None
+    lattice, lasts, q, lengths, chars, _ = _worker_state
+    _relax_into(lattice, lasts, layer, q, lengths, chars)
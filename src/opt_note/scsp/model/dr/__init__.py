@@ -2,28 +2,29 @@
 .. include:: ./README.md
 """
 
+import multiprocessing
+import os
+import queue as queue_module
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
 from typing import Protocol
 
-from .. import la_sh
+import numpy as np
+
+from ... import util
+from .. import didp, dp, la_sh
 
 
 def longest_suffix_index(s1: str, s2: str) -> int:
     """
     `s1[idx:]` が `s2` の部分配列となるもののうち最小の idx を返す.
     (つまり `s1[idx:]` が最長となるようにする. )
-    """
 
-    next = len(s1) - 1
-    for c in reversed(s2):
-        if next == -1:
-            break
-        if s1[next] == c:
-            next -= 1
+    `s1` の `s2` への rightmost 埋め込みで埋め込めなかった文字数に等しい.
+    """
 
-    return next + 1
+    return int((util.embedding.rightmost([s1], s2) < 0).sum())
 
 
 def solve_func_default(instance: list[str]) -> str | None:
@@ -34,6 +35,59 @@ def original_deposition(instance: list[str]) -> str | None:
     return la_sh.Model(instance).solve()
 
 
+def reduction_candidates(
+    instance: list[str] | util.Instance, template: str
+) -> Iterator[tuple[int, tuple[int, ...]]]:
+    """
+    テンプレートの各分割位置 `i` (左側が `template[: i + 1]`) について,
+    右側 `template[i + 1 :]` に埋め込めない各文字列の接頭辞の長さのタプルを `i` の昇順に生成する.
+
+    接頭辞の長さは, テンプレートの rightmost 埋め込みで分割位置以前に対応する文字数に等しい.
+    埋め込みを 1 度だけ計算し, 分割位置を右へ進めながら対応する文字を数えて差分で更新する.
+
+    接頭辞の共通超配列の長さは各文字の出現回数の最大値の和以上なので,
+    これが左側の長さ以上である (左側を短くできない) 分割位置は生成しない.
+    """
+
+    encoded = util.as_instance(instance)
+    owners = np.repeat(np.arange(len(encoded)), encoded.lengths).tolist()
+    codes = encoded.codes.tolist()
+
+    # 文字 (codes の添字) を rightmost 埋め込みの位置の順に並べる.
+    # 埋め込めない文字は位置 -1 として最初から左側に含める.
+    right = util.embedding.rightmost(encoded, template)
+    order = np.argsort(right, kind="stable").tolist()
+    positions = right[order].tolist()
+
+    boundaries = [0 for _ in encoded]
+    counts = [[0 for _ in encoded.chars] for _ in encoded]
+    maxima = [0 for _ in encoded.chars]
+    lower = 0
+    ptr = 0
+    for i in range(len(template)):
+        while ptr < len(order) and positions[ptr] <= i:
+            sidx, c = owners[order[ptr]], codes[order[ptr]]
+            boundaries[sidx] += 1
+            counts[sidx][c] += 1
+            if counts[sidx][c] > maxima[c]:
+                maxima[c] = counts[sidx][c]
+                lower += 1
+            ptr += 1
+
+        if lower < i + 1:
+            yield i, tuple(boundaries)
+
+
+def remaining_prefixes(
+    instance: list[str] | util.Instance, boundaries: tuple[int, ...]
+) -> list[str]:
+    """
+    各文字列の長さ `boundaries` の接頭辞のうち空でないもののリストを返す.
+    """
+
+    return [s[:idx] for s, idx in zip(instance, boundaries) if idx > 0]
+
+
 def original_reduction(
     instance: list[str],
     template: str,
@@ -42,35 +96,37 @@ def original_reduction(
     solve_func: Callable[[list[str]], str | None] = solve_func_default,
     **kwargs,
 ) -> str | None:
+    """
+    テンプレートを左右に分割し, 右側に埋め込めない接頭辞たちの共通超配列で左側を置き換えることを更新がなくなるまで繰り返す.
+
+    分割位置は `reduction_candidates` の順に調べる.
+    `solve_func` の結果は接頭辞の長さのタプルをキーとして保持し, 同じ部分問題は解き直さない.
+    """
+
     start = time.monotonic()
     limit = start + (time_limit if time_limit is not None else float("inf"))
+    memo: dict[tuple[int, ...], str | None] = {}
 
     update = True
     while update:
         update = False
-        for i in range(len(template)):
+        for i, key in reduction_candidates(instance, template):
             if time.monotonic() >= limit:
                 break
 
-            right = template[i + 1 :]
-
-            remaining_prefixes = list(
-                filter(
-                    lambda s: len(s) > 0,
-                    [s[: longest_suffix_index(s, right)] for s in instance],
-                )
-            )
-            if len(remaining_prefixes) == 0:
-                left = ""
+            if key in memo:
+                left = memo[key]
             else:
-                left = solve_func(remaining_prefixes)
+                prefixes = remaining_prefixes(instance, key)
+                left = "" if len(prefixes) == 0 else solve_func(prefixes)
+                memo[key] = left
 
             if left is None:
                 break
 
             if len(left) < i + 1:
                 update = True
-                template = left + right
+                template = left + template[i + 1 :]
                 break
 
         if not update:
@@ -79,6 +135,281 @@ def original_reduction(
     return template
 
 
+def parallel_reduction(
+    instance: list[str],
+    template: str,
+    time_limit: int | None = 60,
+    log: bool = False,
+    *args,
+    sub_model: type[util.ScspModel] = la_sh.Model,
+    workers: int | None = None,
+    sub_time_limit: int | None = None,
+    **kwargs,
+) -> str | None:
+    """
+    `original_reduction` の分割位置ごとの部分問題をプロセスプールで同時に解く.
+
+    テンプレートごとに全ての分割位置の部分問題を `sub_model` で解き,
+    左側を最も短くできる (同じなら最も左の) 分割位置を採用してテンプレートを更新する.
+    改善が 1 つでも見つかった後は, 手の空いたプロセスはその時点で最良の更新後のテンプレートの部分問題を先行して解く.
+    部分問題の結果は接頭辞の長さのタプルをキーとして保持するので, 先行した結果は実際に採用したテンプレートでも使える.
+
+    各部分問題の計算時間上限は `sub_time_limit` と全体の残り時間の小さい方とし, `sub_model` の `solve` に `time_limit` として渡す.
+    既定の `la_sh.Model` のように `time_limit` を無視するモデルではこの上限は効かない.
+    全体の計算時間上限に達した時点で見つかっている最良の更新を採用し, 実行中の部分問題はプロセスごと打ち切って終了する.
+
+    Args:
+        instance(list[str]): 問題インスタンス
+        template(str): テンプレート
+        time_limit(int | None): 全体の計算時間上限
+        log(bool): 更新のたびにテンプレートの長さを出力するか
+        sub_model(type[util.ScspModel]): 部分問題を解くモデル. `sub_time_limit` を効かせるには `time_limit` を守るものを指定する.
+        workers(int | None): プロセス数. 指定しなければ CPU 数.
+        sub_time_limit(int | None): 部分問題 1 つあたりの計算時間上限
+    """
+
+    start = time.monotonic()
+    limit = start + (time_limit if time_limit is not None else float("inf"))
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    memo: dict[tuple[int, ...], str | None] = {}
+    running: set[tuple[int, ...]] = set()
+    results: queue_module.SimpleQueue = queue_module.SimpleQueue()
+
+    def best_update(
+        template: str, candidates: list[tuple[int, tuple[int, ...]]]
+    ) -> str | None:
+        best_gain, best = 0, None
+        for i, key in candidates:
+            left = memo.get(key)
+            if left is not None and i + 1 - len(left) > best_gain:
+                best_gain, best = i + 1 - len(left), left + template[i + 1 :]
+        return best
+
+    # 制限時間到達時に実行中の部分問題も打ち切れるよう terminate 可能な Pool を使う
+    pool = multiprocessing.get_context().Pool(processes=workers)
+    try:
+        while True:
+            candidates = list(reduction_candidates(instance, template))
+            for _, key in candidates:
+                if key not in memo and len(remaining_prefixes(instance, key)) == 0:
+                    memo[key] = ""
+
+            speculative_from: str | None = None
+            speculative: list[tuple[int, ...]] = []
+            while time.monotonic() < limit:
+                unresolved = [key for _, key in candidates if key not in memo]
+                if not unresolved:
+                    break
+
+                # 改善が見つかっていれば, 更新後のテンプレートの部分問題を先行して解く候補にする
+                best = best_update(template, candidates)
+                if best is not None and best != speculative_from:
+                    speculative_from = best
+                    speculative = [
+                        key for _, key in reduction_candidates(instance, best)
+                    ]
+
+                queue = [key for key in unresolved if key not in running]
+                queue += [
+                    key for key in speculative if key not in memo and key not in running
+                ]
+                for key in dict.fromkeys(queue):
+                    if len(running) >= workers:
+                        break
+                    budget = limit - time.monotonic()
+                    if sub_time_limit is not None:
+                        budget = min(budget, sub_time_limit)
+                    pool.apply_async(
+                        _solve_sub,
+                        (
+                            sub_model,
+                            remaining_prefixes(instance, key),
+                            None if budget == float("inf") else max(1, int(budget)),
+                        ),
+                        callback=lambda result, key=key: results.put((key, result)),
+                        error_callback=lambda error, key=key: results.put((key, error)),
+                    )
+                    running.add(key)
+
+                try:
+                    done = [
+                        results.get(
+                            timeout=None
+                            if time_limit is None
+                            else max(0.0, limit - time.monotonic())
+                        )
+                    ]
+                except queue_module.Empty:
+                    done = []
+                while not results.empty():
+                    done.append(results.get())
+                for key, result in done:
+                    running.discard(key)
+                    if isinstance(result, BaseException):
+                        raise result
+                    memo[key] = result
+
+            best = best_update(template, candidates)
+            if best is None:
+                break
+            template = best
+            if log:
+                print(f"reduction: {len(template)}")
+            if time.monotonic() >= limit:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return template
+
+
+def window_bounds(
+    embedding: util.Embedding, start: int, stop: int
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    テンプレートの窓 `template[start:stop]` の外側を固定したとき, 各文字列のうち窓に埋め込む必要がある区間を返す.
+
+    窓より左側には leftmost 埋め込みで `start` 未満に対応する接頭辞を,
+    窓より右側には rightmost 埋め込みで `stop` 以上に対応する接尾辞を埋め込み, 残りの `s[begin:end]` を区間とする.
+    接頭辞と接尾辞が重なる文字列の区間は空 (`begin == end`) とする.
+    区間の文字は leftmost 埋め込みでも rightmost 埋め込みでも窓に対応するので, 区間の長さは窓の幅以下である.
+
+    Args:
+        embedding(util.Embedding): テンプレートへの埋め込み
+        start(int): 窓の左端
+        stop(int): 窓の右端 (含まない)
+
+    Returns:
+        各文字列の `begin` のタプルと `end` のタプルの組
+    """
+
+    lengths = np.diff(embedding.offsets)
+    owners = np.repeat(np.arange(len(lengths)), lengths)
+    begins = np.bincount(owners[embedding.left < start], minlength=len(lengths))
+    ends = lengths - np.bincount(
+        owners[embedding.right >= stop], minlength=len(lengths)
+    )
+    return tuple(begins.tolist()), tuple(np.maximum(begins, ends).tolist())
+
+
+def window_strings(
+    instance: list[str] | util.Instance,
+    begins: tuple[int, ...],
+    ends: tuple[int, ...],
+) -> list[str]:
+    """
+    各文字列の区間 `s[begin:end]` のうち空でないものを重複を除いて返す.
+    """
+
+    return list(
+        dict.fromkeys(
+            s[begin:end] for s, begin, end in zip(instance, begins, ends) if begin < end
+        )
+    )
+
+
+def window_reduction(
+    instance: list[str],
+    template: str,
+    time_limit: int | None = 60,
+    log: bool = False,
+    *args,
+    sub_model: type[util.ScspModel] | None = None,
+    width: int = 16,
+    step: int | None = None,
+    sub_time_limit: int | None = 10,
+    max_dp_states: int = 100_000,
+    **kwargs,
+) -> str | None:
+    """
+    テンプレートの幅 `width` の窓を `step` ずつ右へずらしながら,
+    窓の外側の埋め込みを固定して窓に埋め込む必要がある区間たちの共通超配列で窓を置き換える.
+
+    区間は `window_bounds` で求める. 区間の長さは窓の幅以下なので,
+    部分問題の大きさはテンプレートの長さによらず `width` と文字列数で抑えられ, `dp` や `didp` などの厳密なモデルで解ける.
+    窓を右端までずらす間に更新がなくなるまで繰り返す.
+
+    区間たちの各文字の出現回数の最大値の和が窓の幅以上であれば窓を短くできないので解かずに飛ばし,
+    一度解いた部分問題の結果は区間のタプルをキーとして使い回す.
+
+    Args:
+        instance(list[str]): 問題インスタンス
+        template(str): テンプレート
+        time_limit(int | None): 全体の計算時間上限
+        log(bool): 更新のたびにテンプレートの長さを出力するか
+        sub_model(type[util.ScspModel] | None): 部分問題を解くモデル.
+            指定しなければ部分問題の状態数 (各区間の長さ + 1 の積) が `max_dp_states` 以下なら `dp`, それ以外は `didp` を使う.
+        width(int): 窓の幅
+        step(int | None): 窓をずらす幅. 指定しなければ `width` の半分.
+        sub_time_limit(int | None): 部分問題 1 つあたりの計算時間上限
+        max_dp_states(int): `sub_model` を指定しないときに `dp` を使う状態数の上限
+    """
+
+    start_time = time.monotonic()
+    limit = start_time + (time_limit if time_limit is not None else float("inf"))
+    step = step if step is not None else max(1, width // 2)
+    memo: dict[tuple[tuple[int, ...], tuple[int, ...]], str | None] = {}
+
+    update = True
+    while update and time.monotonic() < limit:
+        update = False
+        embedding = util.embed(instance, template)
+        start = 0
+        while start < len(template) and time.monotonic() < limit:
+            stop = min(start + width, len(template))
+            key = window_bounds(embedding, start, stop)
+
+            if key not in memo:
+                strings = window_strings(instance, *key)
+                if _count_bound(strings) >= stop - start:
+                    memo[key] = None
+                elif len(strings) == 0:
+                    memo[key] = ""
+                else:
+                    budget = limit - time.monotonic()
+                    if sub_time_limit is not None:
+                        budget = min(budget, sub_time_limit)
+                    states = 1
+                    for s in strings:
+                        states *= len(s) + 1
+                    memo[key] = _solve_sub(
+                        sub_model
+                        if sub_model is not None
+                        else (dp.Model if states <= max_dp_states else didp.Model),
+                        strings,
+                        None if budget == float("inf") else max(1, int(budget)),
+                    )
+
+            middle = memo[key]
+            if middle is not None and len(middle) < stop - start:
+                update = True
+                template = template[:start] + middle + template[stop:]
+                embedding = util.embed(instance, template)
+                if log:
+                    print(f"reduction: {len(template)}")
+
+            start += step
+
+    return template
+
+
+def _count_bound(strings: list[str]) -> int:
+    # 各文字の出現回数の最大値の和は共通超配列の長さの下界
+    maxima: dict[str, int] = {}
+    for s in strings:
+        for c in set(s):
+            maxima[c] = max(maxima.get(c, 0), s.count(c))
+    return sum(maxima.values())
+
+
+def _solve_sub(
+    sub_model: type[util.ScspModel], strings: list[str], time_limit: int | None
+) -> str | None:
+    # 部分問題 (接頭辞たちや窓の区間たち) を解く. プロセスプールに渡せるようモジュールの関数とする.
+    return sub_model(strings).solve(time_limit=time_limit, log=False)
+
+
 class DepositionFuncType(Protocol):
     def __call__(self, instance: list[str]) -> str | None: ...
 
@@ -95,7 +426,7 @@ class ReductionFuncType(Protocol):
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
@@ -6,21 +6,25 @@ from dataclasses import dataclass
 
 from ortools.sat.python import cp_model
 
+from ... import util
 from ..alphabet import Model as ModelAlphabet
 
 
 @dataclass
 class ModelReduction:
-    instance: list[str]
+    instance: list[str] | util.Instance
     template: str
     solution: str | None = None
     best_bound: float = 0.0
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
-        chars = "".join(sorted(set("".join(self.instance + [self.template]))))
-
         cpmodel = cp_model.CpModel()
         cpsolver = cp_model.CpSolver()
 
@@ -55,7 +59,14 @@ class ModelReduction:
         if time_limit is not None:
             cpsolver.parameters.max_time_in_seconds = time_limit
 
-        status = cpsolver.solve(cpmodel)
+        callback = None
+        reporter = None
+        if on_progress is not None:
+            reporter = util.progress.Reporter(on_progress)
+            callback = util.progress.attach_cpsat(cpsolver, reporter)
+        status = cpsolver.solve(cpmodel, callback)
+        if reporter is not None:
+            util.progress.finish_cpsat(cpsolver, reporter)
 
         self.best_bound = cpsolver.best_objective_bound
 
@@ -63,7 +74,7 @@ class ModelReduction:
             solution = ""
             for idx, valid in enumerate(valids):
                 if cpsolver.boolean_value(valid):
-                    solution += chars[idx % len(chars)]
+                    solution += self.template[idx]
             self.solution = solution
         else:
             self.solution = None
@@ -73,19 +84,33 @@ class ModelReduction:
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
     inner_bound: float = 0.0
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
         template = ModelAlphabet(self.instance).solve()
         if template is None:
             return None
         inner_model = ModelReduction(self.instance, template)
-        inner_model.solve(time_limit, log)
+        # テンプレートに制限した問題の下界は元の問題の下界ではないので通知しない
+        inner_model.solve(
+            time_limit,
+            log,
+            on_progress=(
+                None
+                if on_progress is None
+                else util.progress.Reporter(on_progress, report_bound=False)
+            ),
+        )
         self.solution = inner_model.solution
         self.inner_bound = inner_model.best_bound
         return self.solution
@@ -7,16 +7,23 @@ from itertools import chain
 
 import hexaly.optimizer
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
     inner_bound: float = 0.0
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *_args, **_kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *_args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **_kwargs,
     ) -> str | None:
         with hexaly.optimizer.HexalyOptimizer() as hxoptimizer:
             assert isinstance(hxoptimizer.model, hexaly.optimizer.HxModel)
@@ -24,7 +31,9 @@ class Model:
             hxmodel: hexaly.optimizer.HxModel = hxoptimizer.model
             hxparam: hexaly.optimizer.HxParam = hxoptimizer.param
 
-            chars: str = "".join(sorted(set("".join(self.instance))))
+            instance = util.as_instance(self.instance)
+            chars: str = instance.chars
+            codes = instance.code_lists()
             max_len = len(chars) * max(len(s) for s in self.instance)
 
             cvars = [
@@ -32,32 +41,37 @@ class Model:
                 for s in self.instance
             ]
 
-            for sidx, s in enumerate(self.instance):
+            for sidx, s in enumerate(codes):
                 for cidx, c in enumerate(s):
                     if cidx == 0:
                         continue
                     prev_c = s[cidx - 1]
-                    if chars.index(prev_c) < chars.index(c):
+                    if prev_c < c:
                         hxmodel.constraint(cvars[sidx][cidx - 1] <= cvars[sidx][cidx])
                     else:
                         hxmodel.constraint(cvars[sidx][cidx - 1] < cvars[sidx][cidx])
 
             embeds = [
-                hxmodel.array(
-                    [len(chars) * x + chars.index(c) for x, c in zip(cvar, s)]
-                )
-                for cvar, s in zip(cvars, self.instance)
+                hxmodel.array([len(chars) * x + c for x, c in zip(cvar, s)])
+                for cvar, s in zip(cvars, codes)
             ]
 
             hxmodel.minimize(hxmodel.count(hxmodel.union(embeds)))
 
             hxmodel.close()
 
+            reporter = None
+            if on_progress is not None:
+                reporter = util.progress.Reporter(on_progress, report_bound=False)
+                util.progress.attach_hexaly(hxoptimizer, reporter)
+
             if time_limit is not None:
                 hxparam.time_limit = time_limit
             hxparam.verbosity = 1 if log else 0
 
             hxoptimizer.solve()
+            if reporter is not None:
+                util.progress.finish_hexaly(hxoptimizer, reporter)
 
             assert isinstance(hxoptimizer.solution, hexaly.optimizer.HxSolution)
             hxsolution: hexaly.optimizer.HxSolution = hxoptimizer.solution
@@ -70,8 +84,8 @@ class Model:
             }:
                 solution = ""
                 cvars_val: list[list[int]] = [
-                    [x.value * len(chars) + chars.index(c) for x, c in zip(cvar, s)]
-                    for cvar, s in zip(cvars, self.instance)
+                    [x.value * len(chars) + c for x, c in zip(cvar, s)]
+                    for cvar, s in zip(cvars, codes)
                 ]
                 for idx in sorted(set(chain.from_iterable(cvars_val))):
                     solution += chars[idx % len(chars)]
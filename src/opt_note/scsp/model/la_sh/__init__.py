@@ -2,8 +2,180 @@
 .. include:: ./README.md
 """
 
+import concurrent.futures
+import contextlib
 from dataclasses import dataclass
 
+from ... import util
+
+type State = tuple[int, ...]
+type Child = tuple[int, int, State, tuple[int, ...]]
+
+
+class Lookahead:
+    """
+    各文字列の先頭位置のタプルを状態として, 数手先まで文字の選び方を探索する.
+
+    1 手の利得は `weighted` が False なら先頭を削除できた文字列数 (sum height),
+    True なら先頭を削除できた文字列の残りの長さの和 (sum weight) とする.
+
+    - 状態ごとに子の状態と利得を展開して保持し, 異なる手順で同じ状態に到達した場合は使い回す.
+    - 状態と残り手数の組ごとに探索結果を保持する.
+    - 残り手数で得られる利得の上界で子を並べ替え, 最良値を超えられない子は探索しない.
+
+    保持した結果は `search` を呼ぶたびに直前の探索で参照したものだけを引き継ぐので,
+    解を 1 文字ずつ伸ばしながら探索を繰り返しても前の探索の部分木を再利用しつつメモリは増え続けない.
+
+    Args:
+        codes(list[list[int]]): 各文字列の添字のリスト
+        weighted(bool): 利得を残りの長さの和にするか
+    """
+
+    def __init__(self, codes: list[list[int]], weighted: bool = False):
+        self.codes = codes
+        self.weighted = weighted
+        self.lengths = [len(s) for s in codes]
+        self._children: dict[State, list[Child]] = {}
+        self._values: dict[tuple[State, int], tuple[int, tuple[int, ...]]] = {}
+        self._previous_children: dict[State, list[Child]] = {}
+        self._previous_values: dict[tuple[State, int], tuple[int, tuple[int, ...]]] = {}
+
+    def search(self, state: State, m: int) -> tuple[tuple[int, ...], int]:
+        """
+        `state` から `m` 手進めたときに利得の和が最大になる文字の添字の列と, その利得の和を返す.
+        全ての文字列が空になる場合は `m` 手より短くなる.
+        最大となる選び方が複数あれば, 各手で添字の小さい文字を優先する.
+
+        Args:
+            state(State): 現在の状態
+            m(int): 先読みする手数
+        """
+
+        return self.search_many([state], m)[0]
+
+    def search_many(
+        self, states: list[State], m: int
+    ) -> list[tuple[tuple[int, ...], int]]:
+        """
+        複数の状態についてまとめて `search` を行う.
+        保持した結果の引き継ぎは全ての状態の探索を通して 1 回とする.
+        """
+
+        self._roll()
+        results = []
+        for state in states:
+            value, path = self._search(state, m)
+            results.append((path, value))
+        return results
+
+    def advance(self, state: State, code: int) -> State:
+        """
+        `state` で添字 `code` の文字を選んだ後の状態を返す.
+        """
+
+        for c, _, child, _ in self.expand(state):
+            if c == code:
+                return child
+        return state
+
+    def expand(self, state: State) -> list[Child]:
+        """
+        `state` で選べる文字の添字, その利得, 選んだ後の状態, 先頭を削除する文字列の番号の組のリストを
+        添字の昇順で返す.
+        """
+
+        children = self._children.get(state)
+        if children is not None:
+            return children
+        children = self._previous_children.get(state)
+        if children is not None:
+            self._children[state] = children
+            return children
+
+        groups: dict[int, list[int]] = {}
+        for sidx, (idx, s) in enumerate(zip(state, self.codes)):
+            if idx < len(s):
+                groups.setdefault(s[idx], []).append(sidx)
+
+        children = []
+        for c in sorted(groups):
+            members = groups[c]
+            child = list(state)
+            for sidx in members:
+                child[sidx] += 1
+            if self.weighted:
+                gain = sum(self.lengths[sidx] - state[sidx] for sidx in members)
+            else:
+                gain = len(members)
+            children.append((c, gain, tuple(child), tuple(members)))
+
+        self._children[state] = children
+        return children
+
+    def bound(self, state: State, m: int) -> int:
+        """
+        `state` から `m` 手で得られる利得の和の上界.
+
+        各文字列は 1 手で高々 1 文字しか削除されないので, 残りの長さ `r` の文字列の寄与は
+        sum height では `min(m, r)`, sum weight では `r + (r - 1) + ... ` の先頭 `min(m, r)` 項で抑えられる.
+        """
+
+        total = 0
+        for idx, length in zip(state, self.lengths):
+            rest = length - idx
+            steps = min(m, rest)
+            if self.weighted:
+                total += steps * rest - steps * (steps - 1) // 2
+            else:
+                total += steps
+        return total
+
+    def _roll(self) -> None:
+        self._previous_children, self._children = self._children, {}
+        self._previous_values, self._values = self._values, {}
+
+    def _search(self, state: State, m: int) -> tuple[int, tuple[int, ...]]:
+        if m == 0:
+            return (0, ())
+
+        key = (state, m)
+        cached = self._values.get(key)
+        if cached is None:
+            cached = self._previous_values.get(key)
+        if cached is not None:
+            self._values[key] = cached
+            return cached
+
+        # 子の上界は自身の上界から削除した文字列の寄与の減少分を引いて求める.
+        # 残りの長さ r の文字列の寄与の減少分は sum height では r <= m - 1 なら 1 (それ以外 0),
+        # sum weight では min(r, m - 1) となる.
+        base = self.bound(state, m - 1)
+        options = []
+        for c, gain, child, members in self.expand(state):
+            upper = gain + base
+            for sidx in members:
+                rest = self.lengths[sidx] - state[sidx]
+                if self.weighted:
+                    upper -= min(rest, m - 1)
+                elif rest <= m - 1:
+                    upper -= 1
+            options.append((upper, c, gain, child))
+
+        # 上界の大きい順 (同じなら添字の小さい順) に調べ, 上界が最良値に届かなくなったら打ち切る
+        options.sort(key=lambda option: (-option[0], option[1]))
+        best_value, best_code, best_path = 0, -1, ()
+        for upper, c, gain, child in options:
+            if upper < best_value or (upper == best_value and c > best_code):
+                break
+            value, path = self._search(child, m - 1)
+            value += gain
+            if value > best_value or (value == best_value and c < best_code):
+                best_value, best_code, best_path = value, c, (c, *path)
+
+        result = (best_value, best_path)
+        self._values[key] = result
+        return result
+
 
 def find_next_strategy(
     instance: list[str],
@@ -15,48 +187,110 @@ def find_next_strategy(
     現在の状態を受け取り, m 手進めたときに sum height が最大になる文字の選び方 (長さ m の文字列として表される) と sum-height の値を組みにして返す
     """
 
-    if m == 0 or all(idx == len(s) for idx, s in zip(state, instance)):
-        return ("", 0)
-
-    fronts = [s[idx] for idx, s in zip(state, instance) if idx < len(s)]
-    counts = {char: fronts.count(char) for char in chars}
-    max_sum_height = 0
-    max_str_front = ""
-    explores = set()
-    for char in chars:
-        if char not in fronts or char in explores:
-            continue
-        explores.add(char)
-        ahead_state = tuple(
-            idx + 1 if idx < len(s) and s[idx] == char else idx
-            for idx, s in zip(state, instance)
-        )
-        str_ahead, sum_ahead = find_next_strategy(instance, chars, ahead_state, m - 1)
-        if sum_ahead + counts[char] > max_sum_height:
-            max_sum_height = sum_ahead + counts[char]
-            max_str_front = char + str_ahead
-    return (max_str_front, max_sum_height)
+    codes = [[chars.index(c) for c in s] for s in instance]
+    path, value = Lookahead(codes).search(state, m)
+    return ("".join(chars[c] for c in path), value)
+
+
+def merge(
+    instance: list[str] | util.Instance,
+    m: int,
+    ll: int,
+    weighted: bool = False,
+    workers: int | None = None,
+) -> str:
+    """
+    `Lookahead` で m 手先まで探索し, 最良の選び方の先頭 ll 文字を採用することを繰り返して解を求める.
+
+    `workers` に 2 以上を指定すると, 各手の探索で根の子ごとの探索をプロセスプールに分配する.
+    各プロセスは初期化時に文字列を 1 度だけ受け取って自身の `Lookahead` を保持し続ける.
+    子の結果は逐次の探索と同じ規則 (利得の和が最大, 同じなら添字が小さい文字) で比較するので,
+    解は `workers` によらず一致する.
+
+    Args:
+        instance(list[str] | util.Instance): 問題インスタンス
+        m(int): 先読みする手数
+        ll(int): 1 回の探索で採用する文字数
+        weighted(bool): 利得を残りの長さの和にするか (LA-SW)
+        workers(int | None): 並列に探索するプロセス数
+    """
+
+    instance = util.as_instance(instance)
+    chars = instance.chars
+    codes = instance.code_lists()
+    lookahead = Lookahead(codes, weighted)
+    state = tuple(0 for _ in codes)
+    solution = ""
+
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers is not None and workers > 1 and m > 1:
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(codes, weighted),
+                )
+            )
+
+        while lookahead.expand(state):
+            if executor is None:
+                next_codes, _ = lookahead.search(state, m)
+            else:
+                next_codes = _search_parallel(lookahead, executor, workers, state, m)
+            for next_code in next_codes[:ll]:
+                solution += chars[next_code]
+                state = lookahead.advance(state, next_code)
+
+    return solution
+
+
+_worker_lookahead: Lookahead | None = None
+
+
+def _init_worker(codes: list[list[int]], weighted: bool) -> None:
+    global _worker_lookahead
+    _worker_lookahead = Lookahead(codes, weighted)
+
+
+def _search_in_worker(states: list[State], m: int) -> list[tuple[tuple[int, ...], int]]:
+    assert _worker_lookahead is not None
+    return _worker_lookahead.search_many(states, m)
+
+
+def _search_parallel(
+    lookahead: Lookahead,
+    executor: concurrent.futures.Executor,
+    workers: int,
+    state: State,
+    m: int,
+) -> tuple[int, ...]:
+    # 根の子を添字順に workers 個の組に振り分け, 各組の子を m - 1 手探索する
+    lookahead._roll()
+    children = lookahead.expand(state)
+    chunks = [children[k::workers] for k in range(min(workers, len(children)))]
+    futures = [
+        executor.submit(_search_in_worker, [child for _, _, child, _ in chunk], m - 1)
+        for chunk in chunks
+    ]
+
+    best_value, best_code, best_path = -1, -1, ()
+    for chunk, future in zip(chunks, futures):
+        for (c, gain, _, _), (path, value) in zip(chunk, future.result()):
+            value += gain
+            if value > best_value or (value == best_value and c < best_code):
+                best_value, best_code, best_path = value, c, (c, *path)
+    return best_path
 
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
-    def solve(self, m: int = 3, ll: int = 1, *args, **kwargs) -> str:
-        chars = "".join(sorted(set("".join(self.instance))))
-        state = tuple(0 for _ in self.instance)
-        solution = ""
-
-        while not all(idx == len(s) for idx, s in zip(state, self.instance)):
-            next_str, _ = find_next_strategy(self.instance, chars, state, m)
-            solution += next_str[:ll]
-            for next_char in next_str[:ll]:
-                state = tuple(
-                    idx + 1 if idx < len(s) and s[idx] == next_char else idx
-                    for idx, s in zip(state, self.instance)
-                )
-
-        self.solution = solution
+    def solve(
+        self, m: int = 3, ll: int = 1, *args, workers: int | None = None, **kwargs
+    ) -> str:
+        self.solution = merge(self.instance, m, ll, workers=workers)
         return self.solution
@@ -4,6 +4,9 @@
 
 from dataclasses import dataclass
 
+from ... import util
+from .. import la_sh
+
 
 def find_next_strategy(
     instance: list[str],
@@ -15,55 +18,21 @@ def find_next_strategy(
     現在の状態を受け取り, m 手進めたときに weight の和が最大になる文字の選び方 (長さ m の文字列として表される) と sum-weight の値を組みにして返す
     """
 
-    if m == 0 or all(idx == len(s) for idx, s in zip(state, instance)):
-        return ("", 0)
-
-    fronts = [s[idx] for idx, s in zip(state, instance) if idx < len(s)]
-    weights = {
-        char: sum(
-            len(s) - idx
-            for idx, s in zip(state, instance)
-            if idx < len(s) and s[idx] == char
-        )
-        for char in chars
-    }
-    max_sum_weight = 0
-    max_str_front = ""
-    explores = set()
-    for char in chars:
-        if char not in fronts or char in explores:
-            continue
-        explores.add(char)
-        ahead_state = tuple(
-            idx + 1 if idx < len(s) and s[idx] == char else idx
-            for idx, s in zip(state, instance)
-        )
-        str_ahead, sum_ahead = find_next_strategy(instance, chars, ahead_state, m - 1)
-        if sum_ahead + weights[char] > max_sum_weight:
-            max_sum_weight = sum_ahead + weights[char]
-            max_str_front = char + str_ahead
-    return (max_str_front, max_sum_weight)
+    codes = [[chars.index(c) for c in s] for s in instance]
+    path, value = la_sh.Lookahead(codes, weighted=True).search(state, m)
+    return ("".join(chars[c] for c in path), value)
 
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
-    def solve(self, m: int = 3, ll: int = 1, *args, **kwargs) -> str:
-        chars = "".join(sorted(set("".join(self.instance))))
-        state = tuple(0 for _ in self.instance)
-        solution = ""
-
-        while not all(idx == len(s) for idx, s in zip(state, self.instance)):
-            next_str, _ = find_next_strategy(self.instance, chars, state, m)
-            solution += next_str[:ll]
-            for next_char in next_str[:ll]:
-                state = tuple(
-                    idx + 1 if idx < len(s) and s[idx] == next_char else idx
-                    for idx, s in zip(state, self.instance)
-                )
-
-        self.solution = solution
+    def solve(
+        self, m: int = 3, ll: int = 1, *args, workers: int | None = None, **kwargs
+    ) -> str:
+        self.solution = la_sh.merge(
+            self.instance, m, ll, weighted=True, workers=workers
+        )
         return self.solution
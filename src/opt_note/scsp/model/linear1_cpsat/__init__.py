@@ -2,20 +2,32 @@
 .. include:: ./README.md
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from ortools.sat.python import cp_model
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
+    num_vars: int | None = None
+    num_constraints: int | None = None
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
+        timer = util.PhaseTimer()
+
         cpmodel = cp_model.CpModel()
         cpsolver = cp_model.CpSolver()
 
@@ -46,7 +58,18 @@ class Model:
         cpsolver.parameters.log_search_progress = log
         if time_limit is not None:
             cpsolver.parameters.max_time_in_seconds = time_limit
-        status = cpsolver.solve(cpmodel)
+        self.num_vars = len(cpmodel.proto.variables)
+        self.num_constraints = len(cpmodel.proto.constraints)
+        timer.lap("build")
+        callback = None
+        reporter = None
+        if on_progress is not None:
+            reporter = util.progress.Reporter(on_progress, offset=1)
+            callback = util.progress.attach_cpsat(cpsolver, reporter)
+        status = cpsolver.solve(cpmodel, callback)
+        if reporter is not None:
+            util.progress.finish_cpsat(cpsolver, reporter)
+        timer.lap("solve")
 
         self.best_bound = cpsolver.best_objective_bound
 
@@ -70,4 +93,6 @@ class Model:
         else:
             self.solution = None
 
+        timer.lap("extract")
+        self.phase_times = timer.times
         return self.solution
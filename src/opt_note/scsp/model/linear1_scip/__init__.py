@@ -2,20 +2,32 @@
 .. include:: ./README.md
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import pyscipopt
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
+    num_vars: int | None = None
+    num_constraints: int | None = None
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
+        timer = util.PhaseTimer()
+
         scip: pyscipopt.Model = pyscipopt.Model()
 
         max_len = sum(len(s) for s in self.instance)
@@ -53,7 +65,17 @@ class Model:
             scip.setParam("limits/time", time_limit)
         if not log:
             scip.hideOutput()
+        self.num_vars = scip.getNVars()
+        self.num_constraints = scip.getNConss()
+        timer.lap("build")
+        reporter = None
+        if on_progress is not None:
+            reporter = util.progress.Reporter(on_progress)
+            util.progress.attach_scip(scip, reporter)
         scip.optimize()
+        if reporter is not None:
+            util.progress.finish_scip(scip, reporter)
+        timer.lap("solve")
 
         self.best_bound = scip.getDualbound()
 
@@ -75,4 +97,6 @@ class Model:
                     sol_char_idx += 1
                 self.solution = solution
 
+        timer.lap("extract")
+        self.phase_times = timer.times
         return self.solution
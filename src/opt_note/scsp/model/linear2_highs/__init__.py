@@ -3,20 +3,32 @@
 """
 
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import highspy
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
+    phase_times: dict[str, float] = field(default_factory=dict)
+    num_vars: int | None = None
+    num_constraints: int | None = None
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
+        timer = util.PhaseTimer()
+
         chars = "".join(sorted(set("".join(self.instance))))
         max_len = sum(len(s) for s in self.instance)
 
@@ -66,7 +78,17 @@ class Model:
         highs.setOptionValue("output_flag", log)
         if time_limit is not None:
             highs.setOptionValue("time_limit", time_limit)
+        self.num_vars = highs.getNumCol()
+        self.num_constraints = highs.getNumRow()
+        timer.lap("build")
+        reporter = None
+        if on_progress is not None:
+            reporter = util.progress.Reporter(on_progress)
+            util.progress.attach_highs(highs, reporter)
         highs.solve()
+        if reporter is not None:
+            util.progress.finish_highs(highs, reporter)
+        timer.lap("solve")
 
         info = highs.getInfo()
         self.best_bound = info.mip_dual_bound
@@ -84,4 +106,6 @@ class Model:
         else:
             self.solution = None
 
+        timer.lap("extract")
+        self.phase_times = timer.times
         return self.solution
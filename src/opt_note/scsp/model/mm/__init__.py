@@ -2,31 +2,67 @@
 .. include:: ./README.md
 """
 
+import heapq
 from dataclasses import dataclass
 
+from ... import util
+
+
+def merge(codes: list[list[int]], num_chars: int) -> list[int]:
+    """
+    Majority Merge で解を求め, 解の各文字の添字のリストを返す.
+
+    先頭がその文字である文字列の番号を文字ごとのバケツで管理し,
+    採用した文字のバケツの文字列だけを進めて次の文字のバケツに移す.
+    最も多い文字は `(-個数, 添字)` のヒープから取り出すので, 同数なら添字の小さい文字を採用する.
+    個数が変わった文字は新しい要素を積み, 古い要素は取り出したときに個数が合わなければ捨てる.
+
+    Args:
+        codes(list[list[int]]): 各文字列の添字のリスト
+        num_chars(int): 文字種数
+    """
+
+    buckets: list[list[int]] = [[] for _ in range(num_chars)]
+    for sidx, s in enumerate(codes):
+        if s:
+            buckets[s[0]].append(sidx)
+    heap = [(-len(bucket), c) for c, bucket in enumerate(buckets) if bucket]
+    heapq.heapify(heap)
+    indices = [0 for _ in codes]
+    solution: list[int] = []
+
+    while heap:
+        count, c = heapq.heappop(heap)
+        bucket = buckets[c]
+        if -count != len(bucket):
+            continue
+
+        solution.append(c)
+        buckets[c] = []
+        changed = set()
+        for sidx in bucket:
+            s = codes[sidx]
+            idx = indices[sidx] + 1
+            indices[sidx] = idx
+            if idx < len(s):
+                buckets[s[idx]].append(sidx)
+                changed.add(s[idx])
+        for d in changed:
+            heapq.heappush(heap, (-len(buckets[d]), d))
+
+    return solution
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
     def solve(self, *args, **kwargs) -> str | None:
-        chars = "".join(sorted(set("".join(self.instance))))
-        indices = [0 for _ in self.instance]
-        solution = ""
-
-        while not all(idx == len(s) for idx, s in zip(indices, self.instance)):
-            fronts = [s[idx] for idx, s in zip(indices, self.instance) if idx < len(s)]
-            counts = [fronts.count(c) for c in chars]
-            next_char = chars[counts.index(max(counts))]
-
-            solution += next_char
-            for jdx in range(len(self.instance)):
-                s = self.instance[jdx]
-                idx = indices[jdx]
-                if idx < len(s) and s[idx] == next_char:
-                    indices[jdx] += 1
-
-        self.solution = solution
+        instance = util.as_instance(self.instance)
+        chars = instance.chars
+        solution = merge(instance.code_lists(), len(chars))
+
+        self.solution = "".join(chars[c] for c in solution)
         return self.solution
@@ -7,10 +7,12 @@ from functools import cached_property
 
 import hexaly.optimizer
 
+from ... import util
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: int = 0
 
@@ -37,7 +39,12 @@ class Model:
         return solution
 
     def solve(
-        self, time_limit: int | None = 60, log: bool = False, *args, **kwargs
+        self,
+        time_limit: int | None = 60,
+        log: bool = False,
+        *args,
+        on_progress: util.progress.ProgressCallback | None = None,
+        **kwargs,
     ) -> str | None:
         cost_table = [
             [
@@ -79,11 +86,18 @@ class Model:
 
             hxmodel.close()
 
+            reporter = None
+            if on_progress is not None:
+                reporter = util.progress.Reporter(on_progress)
+                util.progress.attach_hexaly(hxoptimizer, reporter)
+
             if time_limit is not None:
                 hxparam.time_limit = time_limit
             hxparam.verbosity = 1 if log else 0
 
             hxoptimizer.solve()
+            if reporter is not None:
+                util.progress.finish_hexaly(hxoptimizer, reporter)
 
             assert isinstance(hxoptimizer.solution, hexaly.optimizer.HxSolution)
             hxsolution: hexaly.optimizer.HxSolution = hxoptimizer.solution
@@ -4,35 +4,118 @@
 
 from dataclasses import dataclass
 
+from ... import util
+
+
+def merge(
+    codes: list[list[int]], weights: list[list[int]], num_chars: int
+) -> list[int]:
+    """
+    Weighted Majority Merge で解を求め, 解の各文字の添字のリストを返す.
+
+    各文字の重要度は先頭がその文字である文字列の先頭位置の重みの和とし,
+    重要度が最大の文字 (同じなら添字の小さい文字) を採用する.
+
+    先頭がその文字である文字列の番号を文字ごとのバケツで管理し, 重要度も文字列が進むたびに差分で更新する.
+    文字は重要度の順に位置を管理するヒープ (indexed heap) に並べ, 重要度が変わるたびにその文字の位置だけを直す.
+    1 文字進めるごとの計算量は進んだ文字列数を $k$ として $O(k \\log q)$ となる.
+
+    Args:
+        codes(list[list[int]]): 各文字列の添字のリスト
+        weights(list[list[int]]): 各文字列の各位置の重み. `codes` と同じ形で, 正の値とする.
+        num_chars(int): 文字種数
+    """
+
+    buckets: list[list[int]] = [[] for _ in range(num_chars)]
+    totals = [0 for _ in range(num_chars)]
+    for sidx, s in enumerate(codes):
+        if s:
+            buckets[s[0]].append(sidx)
+            totals[s[0]] += weights[sidx][0]
+
+    # ソート済みのリストはそのままヒープになる
+    heap = sorted(range(num_chars), key=lambda c: (-totals[c], c))
+    positions = [0 for _ in range(num_chars)]
+    for pos, c in enumerate(heap):
+        positions[c] = pos
+
+    indices = [0 for _ in codes]
+    remaining = sum(1 for s in codes if s)
+    solution: list[int] = []
+
+    while remaining > 0:
+        c = heap[0]
+        bucket = buckets[c]
+        if not bucket:
+            # 重みが正でなければ先頭にない文字が選ばれて進まなくなる
+            break
+
+        solution.append(c)
+        buckets[c] = []
+        totals[c] = 0
+        _update(heap, positions, totals, c)
+        for sidx in bucket:
+            s = codes[sidx]
+            idx = indices[sidx] + 1
+            indices[sidx] = idx
+            if idx < len(s):
+                d = s[idx]
+                buckets[d].append(sidx)
+                totals[d] += weights[sidx][idx]
+                _update(heap, positions, totals, d)
+            else:
+                remaining -= 1
+
+    return solution
+
+
+def _update(heap: list[int], positions: list[int], totals: list[int], c: int) -> None:
+    # 重要度が変わった文字 c をヒープ内の正しい位置に移す.
+    # 重要度が大きい文字, 同じなら添字が小さい文字ほど根に近い.
+    total = totals[c]
+    pos = positions[c]
+    while pos > 0:
+        parent = (pos - 1) // 2
+        p = heap[parent]
+        if totals[p] > total or (totals[p] == total and p < c):
+            break
+        heap[pos] = p
+        positions[p] = pos
+        pos = parent
+
+    size = len(heap)
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            break
+        a = heap[child]
+        if child + 1 < size:
+            b = heap[child + 1]
+            if totals[b] > totals[a] or (totals[b] == totals[a] and b < a):
+                child, a = child + 1, b
+        if totals[a] < total or (totals[a] == total and a > c):
+            break
+        heap[pos] = a
+        positions[a] = pos
+        pos = child
+
+    heap[pos] = c
+    positions[c] = pos
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
     def solve(self, *args, **kwargs) -> str | None:
-        chars = "".join(sorted(set("".join(self.instance))))
-        indices = [0 for _ in self.instance]
-        solution = ""
-
-        while not all(idx == len(s) for idx, s in zip(indices, self.instance)):
-            counts = [
-                sum(
-                    len(s) - idx
-                    for idx, s in zip(indices, self.instance)
-                    if idx < len(s) and s[idx] == c
-                )
-                for c in chars
-            ]
-            next_char = chars[counts.index(max(counts))]
-
-            solution += next_char
-            for jdx in range(len(self.instance)):
-                s = self.instance[jdx]
-                idx = indices[jdx]
-                if idx < len(s) and s[idx] == next_char:
-                    indices[jdx] += 1
-
-        self.solution = solution
+        instance = util.as_instance(self.instance)
+        chars = instance.chars
+        codes = instance.code_lists()
+        # 重みは残りの文字列長
+        weights = [list(range(len(s), 0, -1)) for s in codes]
+        solution = merge(codes, weights, len(chars))
+
+        self.solution = "".join(chars[c] for c in solution)
         return self.solution
@@ -7,16 +7,27 @@ from functools import cached_property
 
 import hexaly.optimizer
 
+from ... import util
+from .. import wmm
+
 
 @dataclass
 class Model:
-    instance: list[str]
+    instance: list[str] | util.Instance
     solution: str | None = None
     best_bound: float = 0.0
 
+    @cached_property
+    def encoded(self) -> util.Instance:
+        return util.as_instance(self.instance)
+
     @cached_property
     def chars(self) -> str:
-        return "".join(sorted(set("".join(self.instance))))
+        return self.encoded.chars
+
+    @cached_property
+    def codes(self) -> list[list[int]]:
+        return self.encoded.code_lists()
 
     @cached_property
     def indices_1d_to_2d(self) -> list[tuple[int, int]]:
@@ -31,32 +42,8 @@ class Model:
         return [priorities1d[start:end] for start, end in self.indices_1d_to_2d]
 
     def wmm(self, priorities2d: list[list[int]]) -> str:
-        max_len = len(self.instance) * max(len(s) for s in self.instance)
-        indices = tuple(0 for _ in self.instance)
-        solution = ""
-
-        # while not all(idx == len(s) for idx, s in zip(indices, self.instance)):
-        for _ in range(max_len):
-            if all(idx == len(s) for idx, s in zip(indices, self.instance)):
-                break
-
-            counts = [
-                sum(
-                    priorities2d[sidx][idx]
-                    for sidx, (idx, s) in enumerate(zip(indices, self.instance))
-                    if idx < len(s) and s[idx] == c
-                )
-                for c in self.chars
-            ]
-            next_char = self.chars[counts.index(max(counts))]
-
-            solution += next_char
-            indices = tuple(
-                idx + 1 if idx < len(s) and s[idx] == next_char else idx
-                for idx, s in zip(indices, self.instance)
-            )
-
-        return solution
+        solution = wmm.merge(self.codes, priorities2d, len(self.chars))
+        return "".join(self.chars[c] for c in solution)
 
     def objective(self, priorities1d: list[int]) -> int:
         priorities2d = self.priorities_1d_to_2d(
@@ -71,6 +58,7 @@ class Model:
         log: bool = False,
         initial_weights: list[list[int]] | None = None,
         *args,
+        on_progress: util.progress.ProgressCallback | None = None,
         **kwargs,
     ) -> str | None:
         with hexaly.optimizer.HexalyOptimizer() as hxoptimizer:
@@ -104,6 +92,11 @@ class Model:
             hxmodel.minimize(func(*priorities1d))
             hxmodel.close()
 
+            reporter = None
+            if on_progress is not None:
+                reporter = util.progress.Reporter(on_progress, report_bound=False)
+                util.progress.attach_hexaly(hxoptimizer, reporter)
+
             if initial_weights is not None:
                 priorities2d = self.priorities_1d_to_2d(priorities1d)
                 for ps, ws in zip(priorities2d, initial_weights):
@@ -114,6 +107,8 @@ class Model:
                 hxparam.time_limit = time_limit
             hxparam.verbosity = 1 if log else 0
             hxoptimizer.solve()
+            if reporter is not None:
+                util.progress.finish_hexaly(hxoptimizer, reporter)
 
             assert isinstance(hxoptimizer.solution, hexaly.optimizer.HxSolution)
             solution: hexaly.optimizer.HxSolution = hxoptimizer.solution
@@ -2,29 +2,104 @@
 SCSP インスタンスの読み込み・書き込みや表示を行うユーティリティ.
 """
 
+import mmap
 import os
-import time
-from typing import Protocol
-
-from .. import example
+from collections.abc import Iterator
+from typing import Protocol, TextIO
 
+import numpy as np
 
-def parse(filename: str | os.PathLike) -> list[str]:
+from .. import example
+from . import container, embedding, feasibility, metrics, progress, tables
+from .embedding import Embedding, embed
+from .instance import Instance, as_instance
+from .metrics import BenchResult, PhaseTimer
+
+__all__ = [
+    "BenchResult",
+    "Embedding",
+    "Instance",
+    "PhaseTimer",
+    "ScspModel",
+    "as_instance",
+    "bench",
+    "container",
+    "embed",
+    "embedding",
+    "feasibility",
+    "is_feasible",
+    "iter_mmap",
+    "load_mmap",
+    "metrics",
+    "parse",
+    "progress",
+    "save",
+    "show",
+    "tables",
+]
+
+
+def parse(filename: str | os.PathLike) -> list[str] | Instance:
     """
     問題インスタンスをファイルから読み込む.
 
     ファイルには文字列が改行区切りで書かれている想定.
-    各行に書かれた文字列のリストを返す.
+    各行に書かれた文字列のリストを返す. 空行は無視する.
+
+    ファイルが `container` のバイナリ形式であればそれを判別し,
+    `container.load` でメモリマップから読み込んだ `Instance` を返す.
 
     Args:
         filename(str | os.PathLike): インスタンスファイル名
     """
 
+    if container.is_container(filename):
+        return container.load(filename)
+
     with open(filename, mode="r", encoding="UTF-8") as file:
-        instance = [s.strip() for s in file]
+        instance = [s for s in (line.strip() for line in file) if s]
     return instance
 
 
+def load_mmap(filename: str | os.PathLike) -> Instance:
+    """
+    問題インスタンスをファイルからメモリマップで読み込み, 符号化して返す.
+
+    `parse` と異なり文字列ごとに Python のオブジェクトを作らないため,
+    文字列数が多い巨大なインスタンスでも高速に読み込める.
+    ASCII 以外の文字を含むファイルには対応しない.
+
+    Args:
+        filename(str | os.PathLike): インスタンスファイル名
+    """
+
+    with open(filename, mode="rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return Instance.from_strings([])
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return Instance.from_bytes(mapped)
+
+
+def iter_mmap(filename: str | os.PathLike) -> Iterator[str]:
+    """
+    問題インスタンスの文字列をファイルからメモリマップで 1 つずつ読み込むジェネレータ.
+
+    全体をメモリ上に展開せずに文字列を順番に処理したい場合に用いる. 空行は無視する.
+
+    Args:
+        filename(str | os.PathLike): インスタンスファイル名
+    """
+
+    with open(filename, mode="rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                s = line.strip()
+                if s:
+                    yield s.decode("UTF-8")
+
+
 def save(instance: list[str], filename: str | os.PathLike) -> None:
     """
     問題インスタンスをファイルに書き出す.
@@ -38,92 +113,119 @@ def save(instance: list[str], filename: str | os.PathLike) -> None:
         file.write("\n".join(instance))
 
 
-def is_feasible(instance: list[str], solution: str) -> bool:
+def is_feasible(instance: list[str] | Instance, solution: str) -> bool:
     """
     解が実行可能かどうか判定する.
 
     solution 文字列が instance 内の全ての文字列の supersequence になっていれば True,
     どれか 1 つでも満たさなければ False を返す.
+    判定は `embedding.leftmost` で全ての文字列の埋め込みを求めて行う.
+    多数の解候補をまとめて判定する場合は `feasibility.check_batch` を用いる.
 
     Args:
-        instance(list[str]): 問題インスタンス
+        instance(list[str] | Instance): 問題インスタンス
         solution(str): 共通超配列
     """
 
-    for seq in instance:
-        state = 0
-        for c in solution:
-            if state >= len(seq):
-                break
-            elif c == seq[state]:
-                state += 1
-
-        if state < len(seq):
-            return False
+    return bool((embedding.leftmost(instance, solution) >= 0).all())
 
-    return True
 
-
-def show(instance: list[str], solution: str | None = None) -> None:
+def show(
+    instance: list[str] | Instance,
+    solution: str | None = None,
+    *,
+    file: TextIO | None = None,
+    start: int = 0,
+    width: int | None = None,
+    max_rows: int | None = None,
+) -> None:
     """
     最適化条件または最適化結果を表示する.
 
     solution 引数が与えられなかった場合は問題インスタンスの文字列を表示する.
     solution 引数が与えられた場合は最適化条件の各文字列がどのように解の部分列になっているかを表示する.
+    各文字列の埋め込みは `embedding.leftmost` でまとめて計算し, 1 行ずつ出力する.
 
     solution が instance 内の各文字列の supersequence となっているかどうかはチェックしない.
 
     Args:
-        instance(list[str]): 問題インスタンス(文字列のリスト)
+        instance(list[str] | Instance): 問題インスタンス(文字列のリスト)
         solution(str | None): 共通超配列(文字列)
+        file(TextIO | None): 出力先. 指定しなければ標準出力.
+        start(int): 表示する列の開始位置
+        width(int | None): 表示する列数. 指定しなければ末尾まで表示する.
+        max_rows(int | None): 表示する文字列数の上限. 超えた分は省略してその数を表示する.
     """
 
     instance_len = len(instance)
     tag_width = len(str(instance_len)) + 3
+    rows = instance_len if max_rows is None else min(max_rows, instance_len)
+    end = None if width is None else start + width
+    tags = [f"str{str(idx + 1).rjust(tag_width - 3, '0')}: " for idx in range(rows)]
 
     if solution is None:
         # 問題インスタンスを出力する
-        print(f"--- Condition (with {len(set(''.join(instance)))} chars) ---")
-        for idx, seq in enumerate(instance):
-            print(f"str{str(idx + 1).rjust(tag_width - 3, '0')}", end=": ")
-            print(seq)
+        num_chars = (
+            len(instance.chars)
+            if isinstance(instance, Instance)
+            else len(set("".join(instance)))
+        )
+        lines = [f"--- Condition (with {num_chars} chars) ---"]
+        lines += [tag + seq[start:end] for tag, seq in zip(tags, instance)]
     else:
         # 解とインスタンスの関係を出力する
-        print(f"--- Solution (of length {len(solution)}) ---")
-        print("Sol".rjust(tag_width), end=": ")
-        print(solution)
+        lines = [f"--- Solution (of length {len(solution)}) ---"]
+        lines.append("Sol".rjust(tag_width) + ": " + solution[start:end])
+
+        encoded = as_instance(instance)
+        stop = len(solution) if end is None else min(end, len(solution))
+        offset = min(start, stop)
+        positions = embedding.leftmost(encoded, solution)[: encoded.offsets[rows]]
+        owners = np.repeat(np.arange(rows), encoded.lengths[:rows])
+        visible = (offset <= positions) & (positions < stop)
+
+        # 解の文字を配置した (rows, 表示列数) 型のコードポイントの配列を作り, まとめて文字列に戻す
+        grid = np.full((rows, stop - offset), ord("-"), dtype=np.uint32)
+        points = np.frombuffer(solution.encode("utf-32-le"), dtype=np.uint32)
+        grid[owners[visible], positions[visible] - offset] = points[positions[visible]]
+        text = grid.tobytes().decode("utf-32-le")
+        lines += [
+            tag + text[idx * (stop - offset) : (idx + 1) * (stop - offset)]
+            for idx, tag in enumerate(tags)
+        ]
+
+    if rows < instance_len:
+        lines.append(f"... ({instance_len - rows} more strings)")
+    print("\n".join(lines), end="\n\n", file=file)
 
-        for idx, seq in enumerate(instance):
-            print(f"str{str(idx + 1).rjust(tag_width - 3, '0')}", end=": ")
-            state = 0
-            for c in solution:
-                if state < len(seq) and c == seq[state]:
-                    print(c, end="")
-                    state += 1
-                else:
-                    print("-", end="")
-            print()
 
-    print()
+class ScspModel(Protocol):
+    """
+    最適化モデルが満たすべきインターフェース.
 
+    ソルバーを用いるモデルの `solve` はキーワード引数 `on_progress` で求解途中の進捗を通知する.
+    `progress` を参照.
+    """
 
-class ScspModel(Protocol):
-    instance: list[str]
+    instance: list[str] | Instance
     solution: str | None
     best_bound: float
 
-    def __init__(self, instance: list[str]): ...
+    def __init__(self, instance: list[str] | Instance): ...
     def solve(self, time_limit: int | None, log: bool) -> str | None: ...
 
 
 def bench(
     Model: type[ScspModel],
     *,
-    instance: list[str] | None = None,
+    instance: list[str] | Instance | None = None,
     example_filename: example.ExampleFileName | None = None,
     time_limit: int | None = 60,
     log: bool = False,
-) -> None:
+    trace_memory: bool = False,
+    quiet: bool = False,
+    **kwargs,
+) -> BenchResult:
     """
     与えられたモデルで与えられたインスタンスに対して最適化計算をし, 結果情報を出力する.
     `instance` と `example_filename` はどちらかだけを指定する必要がある.
@@ -136,13 +238,20 @@ def bench(
     - 目的関数値.
     - Dual Bound. 情報がなければ `0.0` と表示される.
     - サブモデルの dual bound があれば表示する. `inner_bound` という名前の属性の有無で判定する.
+    - 経過時間, CPU 時間, 最大常駐メモリ.
+    - モデルが計測していればフェーズごとの経過時間, 変数の数, 制約の数. `metrics` を参照.
+
+    計測結果は `BenchResult` として返す.
 
     Args:
         Model(type[ScspModel]): 最適化モデルクラス. 指定された属性やメソッドを持つ必要がある.
-        instance(list[str] | None): 問題インスタンス.
+        instance(list[str] | Instance | None): 問題インスタンス.
         example_filename(ExampleFileName | None): サンプルインスタンスファイル名.
         time_limit(int): 計算時間上限.
         log(bool): 最適化モデルのログ出力を有効にするか.
+        trace_memory(bool): tracemalloc で Python のメモリ割り当てを計測するか.
+        quiet(bool): 結果情報を出力しないか.
+        kwargs: `solve` に渡す追加の引数.
     """
 
     if (instance is None and example_filename is None) or (
@@ -160,23 +269,34 @@ def bench(
     assert instance_inner is not None
 
     model = Model(instance_inner)
-
-    start = time.monotonic()
-    solution = model.solve(time_limit=time_limit, log=log)
-    end = time.monotonic()
+    result = metrics.measure(
+        model, time_limit=time_limit, log=log, trace_memory=trace_memory, **kwargs
+    )
+    if quiet:
+        return result
 
     show(instance_inner)
-    if solution is not None:
-        show(instance_inner, solution)
+    if result.solution is not None:
+        show(instance_inner, result.solution)
     else:
         print("--- Solution not found ---\n")
 
     if example_filename is not None:
         print(f"example file name: '{example_filename}'")
-    print(
-        f"best objective: {len(model.solution) if model.solution is not None else None}"
-    )
-    print(f"best bound: {model.best_bound}")
-    if hasattr(model, "inner_bound"):
-        print(f"best submodel bound: {model.inner_bound}")
-    print(f"wall time: {end - start:.2f}s")
+    print(f"best objective: {result.objective}")
+    print(f"best bound: {result.best_bound}")
+    if result.inner_bound is not None:
+        print(f"best submodel bound: {result.inner_bound}")
+    print(f"wall time: {result.wall:.2f}s")
+    print(f"cpu time: {result.cpu:.2f}s")
+    print(f"peak rss: {result.peak_rss / 2**20:.1f}MiB")
+    if result.traced_peak is not None:
+        print(f"traced peak: {result.traced_peak / 2**20:.1f}MiB")
+    for name, elapsed in result.phase_times.items():
+        print(f"{name} time: {elapsed:.2f}s")
+    if result.num_vars is not None:
+        print(f"variables: {result.num_vars}")
+    if result.num_constraints is not None:
+        print(f"constraints: {result.num_constraints}")
+
+    return result
@@ -0,0 +1,202 @@
+"""
+問題インスタンスと解のバイナリ形式.
+
+ファイルは以下の順に並ぶ. 整数は全てリトルエンディアン.
+
+1. ヘッダ: マジックナンバー `MAGIC`, バージョン, セクション数.
+1. セクションディレクトリ: 各セクションの名前, dtype, 形状, 開始位置, バイト数.
+1. 各セクションのデータ. 開始位置は `ALIGN` バイト境界に揃える.
+1. 末尾 4 バイト: それより前の全バイトの CRC32.
+
+セクションは以下の通り.
+
+- `chars`: アルファベットの各文字のコードポイント.
+- `offsets`, `codes`: `Instance` の同名の配列.
+- `solution` (省略可): 解の添字の配列.
+- `table:{name}` (省略可): `Instance.tables` の前計算テーブル.
+
+読み込みはメモリマップ上の `memoryview` から `np.frombuffer` で配列を作るのでコピーが発生しない.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+
+import numpy as np
+
+from . import tables as tables_module
+from .instance import Instance, as_instance, encode
+
+MAGIC = b"SCSPBIN\x00"
+VERSION = 1
+ALIGN = 64
+
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<24s8sIIQQQQ")
+_CRC = struct.Struct("<I")
+_TABLE_PREFIX = "table:"
+
+
+def is_container(filename: str | os.PathLike) -> bool:
+    """
+    ファイルがバイナリ形式かどうかを先頭のマジックナンバーで判定する.
+
+    Args:
+        filename(str | os.PathLike): ファイル名
+    """
+
+    with open(filename, mode="rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def dump(
+    instance: list[str] | Instance,
+    filename: str | os.PathLike,
+    *,
+    solution: str | None = None,
+    tables: Iterable[str] = (),
+) -> None:
+    """
+    問題インスタンスをバイナリ形式でファイルに書き出す.
+
+    `instance.tables` に格納済みの前計算テーブルは全て書き出す.
+
+    Args:
+        instance(list[str] | Instance): 問題インスタンス
+        filename(str | os.PathLike): ファイル名
+        solution(str | None): 一緒に保存する解
+        tables(Iterable[str]): 追加で計算して保存する前計算テーブルの名前. `tables.NAMES` を参照.
+    """
+
+    instance = tables_module.compute(as_instance(instance), tuple(tables))
+
+    sections = {
+        "chars": np.frombuffer(instance.chars.encode("utf-32-le"), dtype="<u4"),
+        "offsets": instance.offsets.astype("<i8", copy=False),
+        "codes": instance.codes,
+    }
+    if solution is not None:
+        sections["solution"] = encode(solution, instance.chars, len(instance.chars))
+        if (sections["solution"] == len(instance.chars)).any():
+            raise ValueError("解にインスタンスに現れない文字が含まれています.")
+        sections["solution"] = sections["solution"].astype(instance.codes.dtype)
+    for name, table in instance.tables.items():
+        sections[_TABLE_PREFIX + name] = table
+
+    position = _align(_HEADER.size + _SECTION.size * len(sections))
+    directory = []
+    for name, array in sections.items():
+        array = np.ascontiguousarray(array)
+        if (
+            len(name.encode("UTF-8")) > 24
+            or array.dtype.byteorder == ">"
+            or array.ndim > 2
+        ):
+            raise ValueError(f"セクション {name} は保存できない配列です.")
+        shape = tuple(array.shape) + (0,) * (2 - array.ndim)
+        directory.append(
+            _SECTION.pack(
+                name.encode("UTF-8"),
+                array.dtype.newbyteorder("<").str.encode("ascii"),
+                array.ndim,
+                0,
+                *shape,
+                position,
+                array.nbytes,
+            )
+        )
+        sections[name] = array
+        position = _align(position + array.nbytes)
+
+    crc = 0
+    with open(filename, mode="wb") as file:
+
+        def write(data: bytes | memoryview) -> None:
+            nonlocal crc
+            file.write(data)
+            crc = zlib.crc32(data, crc)
+
+        write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        for entry in directory:
+            write(entry)
+        for array in sections.values():
+            write(b"\x00" * (_align(file.tell()) - file.tell()))
+            write(memoryview(array).cast("B"))
+        write(b"\x00" * (_align(file.tell()) - file.tell()))
+        file.write(_CRC.pack(crc))
+
+
+def load(filename: str | os.PathLike, verify: bool = True) -> Instance:
+    """
+    バイナリ形式のファイルから問題インスタンスを読み込む.
+
+    返り値の配列はメモリマップのビューであり, 書き換えることはできない.
+    前計算テーブルがあれば `Instance.tables` に格納される.
+
+    Args:
+        filename(str | os.PathLike): ファイル名
+        verify(bool): CRC32 を検証するか
+    """
+
+    sections = _read(filename, verify)
+    chars = sections["chars"].tobytes().decode("utf-32-le")
+    tables = {
+        name.removeprefix(_TABLE_PREFIX): array
+        for name, array in sections.items()
+        if name.startswith(_TABLE_PREFIX)
+    }
+    return Instance(chars, sections["codes"], sections["offsets"], tables)
+
+
+def load_solution(filename: str | os.PathLike, verify: bool = True) -> str | None:
+    """
+    バイナリ形式のファイルに保存された解を読み込む. 保存されていなければ None を返す.
+
+    Args:
+        filename(str | os.PathLike): ファイル名
+        verify(bool): CRC32 を検証するか
+    """
+
+    sections = _read(filename, verify)
+    if "solution" not in sections:
+        return None
+    chars = sections["chars"]
+    return chars[sections["solution"]].tobytes().decode("utf-32-le")
+
+
+def _align(position: int) -> int:
+    return -(-position // ALIGN) * ALIGN
+
+
+def _read(filename: str | os.PathLike, verify: bool) -> dict[str, np.ndarray]:
+    # 返す配列がメモリマップを参照し続けるので mmap は閉じない.
+    # 全ての配列が破棄された時点で解放される.
+    with open(filename, mode="rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    if len(view) < _HEADER.size + _CRC.size:
+        raise ValueError(f"{filename} はバイナリ形式のファイルではありません.")
+    magic, version, num_sections = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{filename} はバイナリ形式のファイルではありません.")
+    if version != VERSION:
+        raise ValueError(f"{filename} は未対応のバージョン {version} のファイルです.")
+    if verify:
+        (expected,) = _CRC.unpack_from(view, len(view) - _CRC.size)
+        if zlib.crc32(view[: -_CRC.size]) != expected:
+            raise ValueError(f"{filename} のチェックサムが一致しません.")
+
+    sections = {}
+    for k in range(num_sections):
+        name, dtype, ndim, _, *shape, position, nbytes = _SECTION.unpack_from(
+            view, _HEADER.size + _SECTION.size * k
+        )
+        array = np.frombuffer(
+            view[position : position + nbytes],
+            dtype=np.dtype(dtype.rstrip(b"\x00").decode("ascii")),
+        )
+        sections[name.rstrip(b"\x00").decode("UTF-8")] = array.reshape(shape[:ndim])
+    return sections
@@ -0,0 +1,146 @@
+"""
+インスタンスの文字列の解への埋め込み.
+
+文字列 `s` の解 `solution` への埋め込みとは, `s` の各文字に対応する `solution` の添字の増加列のことである.
+解の次出現位置テーブルを用いて全ての文字列を同時に 1 文字ずつ進めて計算する.
+
+先頭から貪欲に埋め込んだ leftmost 埋め込みと末尾から貪欲に埋め込んだ rightmost 埋め込みを提供する.
+各文字列の `k` 文字目は, 任意の埋め込みにおいて `left[k]` 以上 `right[k]` 以下の位置に対応する.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instance import Instance, as_instance, encode
+from .tables import next_positions
+
+
+def leftmost(instance: Sequence[str], solution: str) -> np.ndarray:
+    """
+    各文字列を解の先頭から貪欲に埋め込んだときの, 各文字に対応する解の添字を返す.
+
+    返り値は `as_instance(instance).codes` と同じ並びの 1 次元の int64 配列で,
+    `i` 番目の文字列の `k` 文字目の添字は `[offsets[i] + k]` に入る.
+    埋め込めなかった文字 (解が超配列でない場合) は `-1` とする.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solution(str): 解
+    """
+
+    instance = as_instance(instance)
+    q = len(instance.chars)
+    length = len(solution)
+
+    # table[i, c]: solution[i:] で文字 c が最初に現れる位置. なければ length.
+    # 列 q は埋め草用で常に length. インスタンスに現れない解の文字 (q + 1) は無視される.
+    table = next_positions(encode(solution, instance.chars, q + 1), q + 1)
+
+    padded = instance.padded(q)
+    positions = np.empty(padded.shape, dtype=np.int64)
+    states = np.zeros(len(instance), dtype=np.int64)
+    for k in range(padded.shape[1]):
+        positions[:, k] = table[states, padded[:, k]]
+        states = np.minimum(positions[:, k] + 1, length)
+
+    flat = positions[np.arange(padded.shape[1]) < instance.lengths[:, None]]
+    flat[flat == length] = -1
+    return flat
+
+
+def rightmost(instance: Sequence[str], solution: str) -> np.ndarray:
+    """
+    各文字列を解の末尾から貪欲に埋め込んだときの, 各文字に対応する解の添字を返す.
+
+    返り値の形式は `leftmost` と同じ.
+    埋め込めなかった文字 (解が超配列でない場合) は `-1` とし, それらは各文字列の先頭側に並ぶ.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solution(str): 解
+    """
+
+    # 全ての文字列と解を反転して leftmost 埋め込みを求め, 添字を元に戻す
+    instance = as_instance(instance)
+    offsets = np.zeros_like(instance.offsets)
+    np.cumsum(instance.lengths[::-1], out=offsets[1:])
+    reversed_instance = Instance(instance.chars, instance.codes[::-1], offsets)
+
+    positions = leftmost(reversed_instance, solution[::-1])[::-1]
+    return np.where(positions >= 0, len(solution) - 1 - positions, -1)
+
+
+@dataclass(frozen=True)
+class Embedding:
+    """
+    全ての文字列の leftmost 埋め込みと rightmost 埋め込み.
+
+    Attributes:
+        left(np.ndarray): `leftmost` の返り値
+        right(np.ndarray): `rightmost` の返り値
+        offsets(np.ndarray): `i` 番目の文字列の添字が `[offsets[i]:offsets[i + 1]]` に入る
+    """
+
+    left: np.ndarray
+    right: np.ndarray
+    offsets: np.ndarray
+
+    @property
+    def feasible(self) -> np.ndarray:
+        """
+        各文字列が解の部分配列かどうかを表す bool 型の配列.
+        """
+
+        lengths = np.diff(self.offsets)
+        owners = np.repeat(np.arange(len(lengths)), lengths)
+        feasible = np.ones(len(lengths), dtype=np.bool_)
+        feasible[owners[self.left < 0]] = False
+        return feasible
+
+    def leftmost_of(self, i: int) -> np.ndarray:
+        """
+        `i` 番目の文字列の leftmost 埋め込み.
+        """
+
+        return self.left[self.offsets[i] : self.offsets[i + 1]]
+
+    def rightmost_of(self, i: int) -> np.ndarray:
+        """
+        `i` 番目の文字列の rightmost 埋め込み.
+        """
+
+        return self.right[self.offsets[i] : self.offsets[i + 1]]
+
+
+def embed(instance: Sequence[str], solution: str) -> Embedding:
+    """
+    全ての文字列の leftmost 埋め込みと rightmost 埋め込みをまとめて計算する.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solution(str): 解
+    """
+
+    instance = as_instance(instance)
+    return Embedding(
+        leftmost(instance, solution), rightmost(instance, solution), instance.offsets
+    )
+
+
+def compact(instance: Sequence[str], solution: str) -> str:
+    """
+    どの文字列の leftmost 埋め込みにも使われない解の文字を取り除いた解を返す.
+
+    解が共通超配列であれば返り値も共通超配列であり, 長さは元の解以下となる.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solution(str): 解
+    """
+
+    positions = leftmost(instance, solution)
+    used = np.zeros(len(solution), dtype=np.bool_)
+    used[positions[positions >= 0]] = True
+    return "".join(c for c, keep in zip(solution, used.tolist()) if keep)
@@ -0,0 +1,97 @@
+"""
+解の実行可能性判定エンジン.
+
+解の各位置から各文字が次に現れる位置を表す次出現位置テーブルを NumPy 配列として前計算し,
+インスタンス内の各文字列をテーブル参照 `len(s)` 回で判定する.
+全ての文字列を同時に 1 文字ずつ進めるため, Python のループ回数は最大文字列長で抑えられる.
+
+また, 1 つのインスタンスに対して多数の解候補をまとめて判定する `check_batch` を提供する.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from .instance import Instance, alphabet, encode_padded
+from .tables import next_positions
+
+
+def next_table(solution: str, chars: str) -> np.ndarray:
+    """
+    解の次出現位置テーブルを返す.
+
+    返り値 `table` は `(len(solution) + 1, len(chars))` 型の配列で,
+    `table[i, c]` は `solution[i:]` の中で文字 `chars[c]` が最初に現れる位置を表す.
+    現れない場合は `len(solution)` とする.
+
+    Args:
+        solution(str): 共通超配列
+        chars(str): ソート済みのアルファベット
+    """
+
+    return transition_tables([solution], chars)[0, :-1, : len(chars)] - 1
+
+
+def transition_tables(solutions: Sequence[str], chars: str) -> np.ndarray:
+    """
+    解候補たちの状態遷移テーブルをまとめて返す.
+
+    `L` を解候補の最大長, `q = len(chars)` としたとき返り値は `(len(solutions), L + 2, q + 2)` 型の配列で,
+    解 `b` の `i` 文字目までを消費した状態で文字 `chars[c]` を読んだ後の状態が `table[b, i, c]` に入る.
+    状態 `L + 1` は失敗状態を表す.
+    列 `q` は状態を変えない埋め草用, 列 `q + 1` は常に失敗状態へ遷移する未知文字用である.
+
+    Args:
+        solutions(Sequence[str]): 解候補のリスト
+        chars(str): ソート済みのアルファベット
+    """
+
+    q = len(chars)
+    width = max((len(solution) for solution in solutions), default=0)
+    fail = width + 1
+
+    # 埋め草と解にしか現れない文字は q として次出現位置テーブルでは無視される.
+    codes = encode_padded(solutions, chars, q)
+    positions = next_positions(codes, q)
+
+    table = np.full((len(solutions), width + 2, q + 2), fail, dtype=np.int32)
+    # 見つからない位置 width は 1 を足すと失敗状態になる
+    np.add(positions, 1, out=table[:, :-1, :q])
+    table[:, :, q] = np.arange(width + 2)
+
+    return table
+
+
+def check(instance: Sequence[str], solution: str) -> bool:
+    """
+    解が実行可能かどうか判定する.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solution(str): 共通超配列
+    """
+
+    return bool(check_batch(instance, [solution])[0])
+
+
+def check_batch(instance: Sequence[str], solutions: Sequence[str]) -> np.ndarray:
+    """
+    複数の解候補が実行可能かどうかをまとめて判定し, bool 型の配列で返す.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+        solutions(Sequence[str]): 解候補のリスト
+    """
+
+    chars = instance.chars if isinstance(instance, Instance) else alphabet(instance)
+    q = len(chars)
+    table = transition_tables(solutions, chars)
+    fail = table.shape[1] - 1
+
+    codes = encode_padded(instance, chars, q)
+    rows = np.arange(len(solutions))[:, None]
+    states = np.zeros((len(solutions), len(instance)), dtype=np.int32)
+    for column in codes.T:
+        states = table[rows, states, column]
+
+    return np.all(states != fail, axis=1)
@@ -0,0 +1,323 @@
+"""
+整数符号化された問題インスタンス.
+
+全ての文字列をアルファベット内の添字に変換して 1 本の配列に連結し,
+各文字列の開始位置を offsets 配列で管理する.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+from functools import cached_property
+from typing import overload
+
+import numpy as np
+
+
+def alphabet(strings: Iterable[str]) -> str:
+    """
+    文字列たちに現れる文字をソートして連結した文字列を返す.
+
+    Args:
+        strings(Iterable[str]): 文字列のリスト
+    """
+
+    return "".join(sorted(set("".join(strings))))
+
+
+def code_dtype(num_chars: int) -> type[np.unsignedinteger]:
+    """
+    文字種数 `num_chars` のアルファベットの添字を格納できる最小の符号なし整数型を返す.
+    """
+
+    if num_chars <= 1 << 8:
+        return np.uint8
+    if num_chars <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+def ascii_alphabet(raw: bytes, ignore: bytes = b"") -> str:
+    """
+    ASCII のバイト列に現れる文字 (`ignore` に含まれるものを除く) をソートして連結した文字列を返す.
+
+    間引いた標本で大半の文字を見つけ, 残りは既知の文字を削除した余りから拾うことで,
+    全体を Python のオブジェクトに展開せずに済ませる.
+    """
+
+    found = set(raw[:: max(1, len(raw) >> 16)]) | set(ignore)
+    found |= set(raw.translate(None, bytes(found)))
+    return bytes(sorted(found - set(ignore))).decode("ascii")
+
+
+def ascii_table(chars: str) -> bytes:
+    """
+    ASCII 文字からなるアルファベット `chars` について,
+    各文字を添字に, それ以外を 0xFF に写す `bytes.translate` 用の変換表を返す.
+    """
+
+    table = bytearray(b"\xff" * 0x100)
+    for code, c in enumerate(chars.encode("ascii")):
+        table[c] = code
+    return bytes(table)
+
+
+def encode(s: str, chars: str, missing: int) -> np.ndarray:
+    """
+    文字列を `chars` 内の添字の配列に変換する.
+
+    `chars` に含まれない文字は `missing` に変換する.
+
+    Args:
+        s(str): 文字列
+        chars(str): ソート済みのアルファベット
+        missing(int): `chars` に含まれない文字に割り当てる値
+    """
+
+    if s.isascii() and chars.isascii():
+        lookup = np.full(0x80, missing, dtype=np.int64)
+        lookup[np.frombuffer(chars.encode("ascii"), dtype=np.uint8)] = np.arange(
+            len(chars)
+        )
+        return lookup[np.frombuffer(s.encode("ascii"), dtype=np.uint8)]
+
+    points = np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32)
+    table = np.frombuffer(chars.encode("utf-32-le"), dtype=np.uint32)
+    codes = np.searchsorted(table, points)
+    found = codes < len(table)
+    found[found] = table[codes[found]] == points[found]
+    return np.where(found, codes, missing).astype(np.int64)
+
+
+def encode_padded(strings: Sequence[str], chars: str, pad: int) -> np.ndarray:
+    """
+    文字列たちを `(len(strings), 最大文字列長)` 型の添字の配列に変換する.
+
+    足りない部分は `pad` で埋める.
+
+    Args:
+        strings(Sequence[str]): 文字列のリスト
+        chars(str): ソート済みのアルファベット. 全ての文字を含む必要がある.
+        pad(int): 埋め草に使う値
+    """
+
+    if isinstance(strings, Instance) and strings.chars == chars:
+        return strings.padded(pad)
+
+    lengths = np.array([len(s) for s in strings], dtype=np.int64)
+    width = int(lengths.max()) if len(strings) > 0 else 0
+    flat = encode("".join(strings), chars, pad)
+    padded = np.full((len(strings), width), pad, dtype=np.int64)
+    mask = np.arange(width) < lengths[:, None]
+    padded[mask] = flat
+    return padded
+
+
+class Instance(Sequence[str]):
+    """
+    整数符号化された問題インスタンス.
+
+    `Sequence[str]` として振る舞うので `list[str]` の代わりにそのまま各モデルに渡すことができる.
+    文字列として参照された場合は初回にまとめて復号してキャッシュする.
+
+    Attributes:
+        chars(str): ソート済みのアルファベット
+        codes(np.ndarray): 全ての文字列の添字を連結した 1 次元配列. 型は `code_dtype(len(chars))`.
+        offsets(np.ndarray): `i` 番目の文字列が `codes[offsets[i]:offsets[i + 1]]` となる長さ `n + 1` の配列
+        tables(dict[str, np.ndarray]): 前計算テーブル. `tables` モジュールを参照.
+    """
+
+    def __init__(
+        self,
+        chars: str,
+        codes: np.ndarray,
+        offsets: np.ndarray,
+        tables: dict[str, np.ndarray] | None = None,
+    ):
+        self.chars = chars
+        self.codes = codes
+        self.offsets = offsets
+        self.tables = {} if tables is None else tables
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "Instance":
+        """
+        文字列のリストを符号化する.
+
+        Args:
+            strings(Iterable[str]): 文字列のリスト
+        """
+
+        strings = list(strings)
+        joined = "".join(strings)
+        if joined.isascii():
+            raw = joined.encode("ascii")
+            chars = ascii_alphabet(raw)
+            codes = np.frombuffer(raw.translate(ascii_table(chars)), dtype=np.uint8)
+        else:
+            chars = alphabet(joined)
+            codes = encode(joined, chars, 0).astype(code_dtype(len(chars)))
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in strings], out=offsets[1:])
+        return cls(chars, codes, offsets)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> "Instance":
+        """
+        改行区切りのテキストのバイト列を文字列オブジェクトを作らずに直接符号化する.
+
+        各行の前後の空白は取り除き, 空行は無視する.
+        ASCII 以外の文字を含む場合は `ValueError` を送出する.
+
+        `data` は NumPy のビューとして読むだけでコピーしない.
+        新たに確保するのは符号化した文字の配列 (改行と前後の空白を除いた文字数) と行ごとの配列のみである.
+        返り値は `data` を参照しないので, 呼び出し後に `data` を閉じてよい.
+
+        >>> with memoryview(b"ab\\n\\xe3\\x81\\x82\\n") as data:
+        ...     Instance.from_bytes(data)
+        Traceback (most recent call last):
+            ...
+        ValueError: ASCII 以外の文字を含むインスタンスには対応していません.
+
+        Args:
+            data(bytes | memoryview): テキストファイルの中身. `mmap.mmap` なども渡せる.
+        """
+
+        buf = np.frombuffer(data, dtype=np.uint8)
+        if buf.size == 0:
+            del buf
+            return cls.from_strings([])
+        if int(buf.max()) >= 0x80:
+            # ビューを残したまま送出すると呼び出し側で data を閉じられない
+            del buf
+            raise ValueError("ASCII 以外の文字を含むインスタンスには対応していません.")
+
+        newlines = np.flatnonzero(buf == ord("\n"))
+        starts = np.append(0, newlines + 1)
+        ends = np.append(newlines, len(buf))
+        keep = np.ones(len(buf), dtype=np.bool_)
+        keep[newlines] = False
+
+        # 各行の前後の空白を 1 文字ずつ削る. 繰り返し回数は空白の連続長で抑えられる.
+        whitespace = np.zeros(0x100, dtype=np.bool_)
+        whitespace[list(b" \t\r\v\f")] = True
+        while True:
+            heads = buf[np.minimum(starts, len(buf) - 1)]
+            trim = (starts < ends) & whitespace[heads]
+            if not trim.any():
+                break
+            keep[starts[trim]] = False
+            starts[trim] += 1
+        while True:
+            tails = buf[np.maximum(ends - 1, 0)]
+            trim = (starts < ends) & whitespace[tails]
+            if not trim.any():
+                break
+            ends[trim] -= 1
+            keep[ends[trim]] = False
+
+        codes = buf[keep]
+        del buf, keep
+
+        nonempty = starts < ends
+        starts, ends = starts[nonempty], ends[nonempty]
+
+        present = np.flatnonzero(np.bincount(codes, minlength=0x80))
+        chars = bytes(present.tolist()).decode("ascii")
+        table = np.frombuffer(ascii_table(chars), dtype=np.uint8)
+        np.take(table, codes, out=codes)
+
+        offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=offsets[1:])
+        return cls(chars, codes, offsets)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """
+        各文字列の長さ.
+        """
+
+        return np.diff(self.offsets)
+
+    @cached_property
+    def counts(self) -> np.ndarray:
+        """
+        `(n, len(chars))` 型の配列で, `counts[i, c]` は `i` 番目の文字列に文字 `chars[c]` が現れる回数.
+        """
+
+        q = len(self.chars)
+        owners = np.repeat(np.arange(len(self)), self.lengths)
+        flat = np.bincount(owners * q + self.codes, minlength=len(self) * q).reshape(
+            len(self), q
+        )
+        return flat.astype(np.int64)
+
+    @cached_property
+    def strings(self) -> list[str]:
+        """
+        復号した文字列のリスト.
+        """
+
+        points = np.frombuffer(self.chars.encode("utf-32-le"), dtype=np.uint32)
+        decoded = points[self.codes].tobytes().decode("utf-32-le")
+        return [
+            decoded[start:end]
+            for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        ]
+
+    def code(self, i: int) -> np.ndarray:
+        """
+        `i` 番目の文字列の添字の配列 (`codes` のビュー) を返す.
+        """
+
+        return self.codes[self.offsets[i] : self.offsets[i + 1]]
+
+    def code_lists(self) -> list[list[int]]:
+        """
+        各文字列の添字を Python の int のリストとして返す.
+        Python のループで 1 文字ずつ参照する場合は ndarray より高速.
+        """
+
+        flat = self.codes.tolist()
+        return [
+            flat[start:end]
+            for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        ]
+
+    def padded(self, pad: int) -> np.ndarray:
+        """
+        `(n, 最大文字列長)` 型の int64 配列に並べ, 足りない部分を `pad` で埋めて返す.
+        """
+
+        lengths = self.lengths
+        width = int(lengths.max()) if len(self) > 0 else 0
+        padded = np.full((len(self), width), pad, dtype=np.int64)
+        padded[np.arange(width) < lengths[:, None]] = self.codes
+        return padded
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        return self.strings[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.strings)
+
+    def __repr__(self) -> str:
+        return f"Instance(n={len(self)}, chars={self.chars!r}, total={len(self.codes)})"
+
+
+def as_instance(instance: Sequence[str]) -> Instance:
+    """
+    `Instance` ならそのまま, そうでなければ符号化して返す.
+
+    Args:
+        instance(Sequence[str]): 問題インスタンス
+    """
+
+    if isinstance(instance, Instance):
+        return instance
+    return Instance.from_strings(instance)
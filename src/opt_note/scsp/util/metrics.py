@@ -0,0 +1,158 @@
+"""
+最適化計算の計測.
+
+モデルは以下の属性を持っていれば計測結果に含められる. いずれも省略可能.
+
+- `phase_times(dict[str, float])`: フェーズごとの経過時間. `PhaseTimer` で計測する.
+  モデル構築 `build`, 求解 `solve`, 解の復元 `extract` の 3 つを基本とする.
+- `num_vars(int)`: ソルバーに渡した変数の数.
+- `num_constraints(int)`: ソルバーに渡した制約の数.
+- `inner_bound(float)`: サブモデルの dual bound.
+"""
+
+import contextlib
+import os
+import resource
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import ScspModel
+
+
+class PhaseTimer:
+    """
+    フェーズごとの経過時間を計測する.
+
+    生成時または直前の `lap` 呼び出しからの経過時間をフェーズ名に対応付けて記録する.
+    同じフェーズ名で複数回呼んだ場合は加算する.
+
+    Attributes:
+        times(dict[str, float]): フェーズ名と経過時間 (秒) の辞書
+    """
+
+    def __init__(self):
+        self.times: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """
+        直前の区切りからの経過時間をフェーズ `name` の時間として記録する.
+        """
+
+        now = time.perf_counter()
+        self.times[name] = self.times.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+
+@dataclass
+class BenchResult:
+    """
+    最適化計算 1 回分の計測結果.
+
+    Attributes:
+        solution(str | None): 解
+        objective(int | None): 解の長さ
+        best_bound(float): 下界
+        inner_bound(float | None): サブモデルの dual bound
+        wall(float): `solve` の経過時間 (秒)
+        cpu(float): `solve` のプロセス CPU 時間 (秒). 全スレッドの合計.
+        peak_rss(int): `solve` 中の最大常駐メモリ (バイト).
+            Linux 以外では計算前の値を下回らず, プロセス開始からの最大値になる.
+        traced_peak(int | None): tracemalloc で計測した Python のメモリ割り当ての最大量 (バイト)
+        phase_times(dict[str, float]): フェーズごとの経過時間 (秒)
+        num_vars(int | None): ソルバーに渡した変数の数
+        num_constraints(int | None): ソルバーに渡した制約の数
+    """
+
+    solution: str | None
+    objective: int | None
+    best_bound: float
+    inner_bound: float | None
+    wall: float
+    cpu: float
+    peak_rss: int
+    traced_peak: int | None = None
+    phase_times: dict[str, float] = field(default_factory=dict)
+    num_vars: int | None = None
+    num_constraints: int | None = None
+
+
+def measure(
+    model: "ScspModel",
+    time_limit: int | None = 60,
+    log: bool = False,
+    trace_memory: bool = False,
+    **kwargs: Any,
+) -> BenchResult:
+    """
+    モデルの `solve` を呼び出して計測結果を返す.
+
+    Args:
+        model(ScspModel): 最適化モデル
+        time_limit(int | None): 計算時間上限
+        log(bool): 最適化モデルのログ出力を有効にするか
+        trace_memory(bool): tracemalloc で Python のメモリ割り当てを計測するか. 計算は遅くなる.
+        kwargs: `solve` に渡す追加の引数
+    """
+
+    reset_peak_rss()
+    if trace_memory:
+        tracemalloc.start()
+
+    wall_start, cpu_start = time.monotonic(), time.process_time()
+    try:
+        solution = model.solve(time_limit=time_limit, log=log, **kwargs)
+    finally:
+        wall, cpu = time.monotonic() - wall_start, time.process_time() - cpu_start
+        traced_peak = None
+        if trace_memory:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    inner_bound = getattr(model, "inner_bound", None)
+    return BenchResult(
+        solution=solution,
+        objective=len(solution) if solution is not None else None,
+        best_bound=float(model.best_bound),
+        inner_bound=float(inner_bound) if inner_bound is not None else None,
+        wall=wall,
+        cpu=cpu,
+        peak_rss=peak_rss(),
+        traced_peak=traced_peak,
+        phase_times=dict(getattr(model, "phase_times", {})),
+        num_vars=getattr(model, "num_vars", None),
+        num_constraints=getattr(model, "num_constraints", None),
+    )
+
+
+def reset_peak_rss() -> None:
+    """
+    Linux であればプロセスの最大常駐メモリ (VmHWM) を現在値にリセットする.
+    """
+
+    with (
+        contextlib.suppress(OSError),
+        open("/proc/self/clear_refs", mode="w") as file,
+    ):
+        file.write("5")
+
+
+def peak_rss() -> int:
+    """
+    プロセスの最大常駐メモリ (バイト) を返す.
+    """
+
+    with (
+        contextlib.suppress(OSError),
+        open("/proc/self/status", mode="r") as file,
+    ):
+        for line in file:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS ではバイト単位, それ以外では KiB 単位
+    return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
@@ -0,0 +1,288 @@
+"""
+求解途中の進捗通知.
+
+ソルバーを用いるモデルの `solve` はキーワード引数 `on_progress` を受け付ける.
+`on_progress(elapsed, primal, dual)` は暫定解または下界が更新されるたびに呼ばれ,
+`True` を返すとその時点で探索を打ち切る.
+
+- `elapsed(float)`: 求解開始からの経過時間 (秒)
+- `primal(float | None)`: 暫定解の長さ. 暫定解がなければ None.
+- `dual(float)`: 解の長さの下界. モデルの `best_bound` と同じく, 情報がなければ `0.0`.
+
+ここでは各ソルバーのコールバック機構を `on_progress` に繋ぐアダプタを提供する.
+終了時の値はコールバックで通知されないことがあるので, `attach_*` を使うモデルは
+求解後に対応する `finish_*` を呼んで最終状態を通知する.
+ソルバーを用いないモデルは `on_progress` を無視する.
+"""
+
+import math
+import time
+from collections.abc import Callable
+
+import didppy
+import hexaly.optimizer
+import highspy
+import pyscipopt
+from ortools.sat.python import cp_model
+
+type ProgressCallback = Callable[[float, float | None, float], bool | None]
+
+
+class Reporter:
+    """
+    ソルバーから受け取った値を整えて `on_progress` を呼び出す.
+
+    値が前回から変化していなければ呼び出さない.
+    一度でも `True` が返されたら以降は `stop` が `True` になる.
+
+    Args:
+        on_progress(ProgressCallback): コールバック
+        offset(float): ソルバーの目的関数値に足すと解の長さになる値
+        report_bound(bool): ソルバーの下界を解の長さの下界として通知するか.
+            部分問題を解くモデルなど, ソルバーの下界が元の問題の下界にならない場合は False にする.
+    """
+
+    def __init__(
+        self,
+        on_progress: ProgressCallback,
+        offset: float = 0.0,
+        report_bound: bool = True,
+    ):
+        self.on_progress = on_progress
+        self.offset = offset
+        self.report_bound = report_bound
+        self.primal: float | None = None
+        self.dual = 0.0
+        self.stop = False
+        self.start = time.monotonic()
+
+    def __call__(
+        self,
+        elapsed: float | None = None,
+        primal: float | None = None,
+        dual: float | None = None,
+    ) -> bool:
+        """
+        更新された値を通知し, 探索を打ち切るべきかを返す.
+        None を渡した値は前回のまま, `elapsed` が None なら生成時からの経過時間とする.
+
+        ソルバーが未発見や非有界を表すために返す巨大な値は無視する.
+        """
+
+        if elapsed is None:
+            elapsed = time.monotonic() - self.start
+
+        updated = False
+        if primal is not None and math.isfinite(primal) and abs(primal) < 1e20:
+            updated |= self.primal != primal + self.offset
+            self.primal = primal + self.offset
+        if self.report_bound and dual is not None and math.isfinite(dual):
+            new_dual = max(self.dual, dual + self.offset)
+            updated |= self.dual != new_dual
+            self.dual = new_dual
+
+        if updated and not self.stop:
+            self.stop = bool(self.on_progress(elapsed, self.primal, self.dual))
+        return self.stop
+
+
+def attach_cpsat(
+    cpsolver: cp_model.CpSolver, reporter: Reporter
+) -> cp_model.CpSolverSolutionCallback:
+    """
+    CP-SAT に `reporter` を繋ぐ.
+
+    下界の更新は `best_bound_callback` で受け取る.
+    返り値の解コールバックを `cpsolver.solve` に渡すこと.
+    """
+
+    class Callback(cp_model.CpSolverSolutionCallback):
+        def on_solution_callback(self) -> None:
+            if reporter(
+                self.wall_time, self.objective_value, self.best_objective_bound
+            ):
+                self.stop_search()
+
+    def on_bound(bound: float) -> None:
+        if reporter(dual=bound):
+            cpsolver.stop_search()
+
+    if reporter.report_bound:
+        cpsolver.best_bound_callback = on_bound
+    return Callback()
+
+
+def finish_cpsat(cpsolver: cp_model.CpSolver, reporter: Reporter) -> None:
+    """
+    CP-SAT の求解後の最終状態を `reporter` に通知する.
+    """
+
+    primal = None
+    if cpsolver.response_proto.status in {cp_model.OPTIMAL, cp_model.FEASIBLE}:
+        primal = cpsolver.objective_value
+    reporter(cpsolver.wall_time, primal, cpsolver.best_objective_bound)
+
+
+def attach_highs(solver: highspy.Highs, reporter: Reporter) -> None:
+    """
+    HiGHS の MIP 求解に `reporter` を繋ぐ.
+
+    暫定解の更新と, 定期的に呼ばれる割り込みコールバックで下界の更新を受け取る.
+    """
+
+    def on_solution(event: highspy.highs.HighsCallbackEvent) -> None:
+        data = event.data_out
+        reporter(data.running_time, data.mip_primal_bound, data.mip_dual_bound)
+
+    def on_interrupt(event: highspy.highs.HighsCallbackEvent) -> None:
+        data = event.data_out
+        if reporter(data.running_time, data.mip_primal_bound, data.mip_dual_bound):
+            event.interrupt()
+
+    solver.cbMipImprovingSolution.subscribe(on_solution)
+    solver.cbMipInterrupt.subscribe(on_interrupt)
+
+
+def finish_highs(solver: highspy.Highs, reporter: Reporter) -> None:
+    """
+    HiGHS の求解後の最終状態を `reporter` に通知する.
+    """
+
+    info = solver.getInfo()
+    primal = None
+    if info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+        primal = info.objective_function_value
+    reporter(solver.getRunTime(), primal, info.mip_dual_bound)
+
+
+def attach_scip(solver: pyscipopt.Model, reporter: Reporter) -> None:
+    """
+    SCIP に `reporter` を繋ぐ.
+
+    最良解の発見とノードの処理完了のイベントで値を受け取る.
+    BESTSOLFOUND は上界の更新前に発生するので, 暫定解の値は最良解から取る.
+    """
+
+    events = pyscipopt.SCIP_EVENTTYPE.BESTSOLFOUND | pyscipopt.SCIP_EVENTTYPE.NODESOLVED
+
+    class Handler(pyscipopt.Eventhdlr):
+        def eventinit(self) -> None:
+            self.model.catchEvent(events, self)
+
+        def eventexit(self) -> None:
+            self.model.dropEvent(events, self)
+
+        def eventexec(self, event: pyscipopt.scip.Event) -> None:
+            if event.getType() == pyscipopt.SCIP_EVENTTYPE.BESTSOLFOUND:
+                primal = self.model.getSolObjVal(self.model.getBestSol())
+            else:
+                primal = self.model.getPrimalbound()
+            if reporter(self.model.getSolvingTime(), primal, self.model.getDualbound()):
+                self.model.interruptSolve()
+
+    solver.includeEventhdlr(Handler(), "progress", "on_progress への通知")
+
+
+def finish_scip(solver: pyscipopt.Model, reporter: Reporter) -> None:
+    """
+    SCIP の求解後の最終状態を `reporter` に通知する.
+    """
+
+    primal = solver.getPrimalbound() if solver.getNSols() > 0 else None
+    reporter(solver.getSolvingTime(), primal, solver.getDualbound())
+
+
+def search_didp(solver: didppy.CABS, reporter: Reporter) -> didppy.Solution:
+    """
+    didppy のソルバーを `search_next` で 1 解ずつ進めながら `reporter` に通知し, 最後の解を返す.
+    """
+
+    while True:
+        solution, terminated = solver.search_next()
+        stop = reporter(solution.time, solution.cost, solution.best_bound)
+        if terminated or stop:
+            return solution
+
+
+def attach_hexaly(
+    optimizer: hexaly.optimizer.HexalyOptimizer, reporter: Reporter
+) -> None:
+    """
+    Hexaly に `reporter` を繋ぐ.
+
+    `time_between_ticks` (既定 1 秒) ごとに呼ばれる TIME_TICKED コールバックで値を受け取る.
+    モデルを閉じた後, 求解前に呼ぶこと.
+    """
+
+    def on_tick(
+        optimizer: hexaly.optimizer.HexalyOptimizer,
+        _type: hexaly.optimizer.HxCallbackType,
+    ) -> None:
+        if finish_hexaly(optimizer, reporter):
+            optimizer.stop()
+
+    optimizer.add_callback(hexaly.optimizer.HxCallbackType.TIME_TICKED, on_tick)
+
+
+def finish_hexaly(
+    optimizer: hexaly.optimizer.HexalyOptimizer, reporter: Reporter
+) -> bool:
+    """
+    Hexaly の現在の状態を `reporter` に通知し, 探索を打ち切るべきかを返す.
+    求解後に呼ぶと最終状態を通知する.
+    """
+
+    solution = optimizer.solution
+    primal = None
+    if solution.status in {
+        hexaly.optimizer.HxSolutionStatus.OPTIMAL,
+        hexaly.optimizer.HxSolutionStatus.FEASIBLE,
+    }:
+        primal = optimizer.model.get_objective(0).value
+    return reporter(
+        optimizer.statistics.running_time, primal, solution.get_objective_bound(0)
+    )
+
+
+class ProgressRecorder:
+    """
+    `on_progress` として渡して進捗の履歴を記録する.
+
+    `target_gap` を指定すると相対ギャップ `(primal - dual) / primal` がそれ以下になった時点で探索を打ち切る.
+
+    Attributes:
+        history(list[tuple[float, float | None, float]]): `(elapsed, primal, dual)` の履歴
+    """
+
+    def __init__(self, target_gap: float | None = None):
+        self.target_gap = target_gap
+        self.history: list[tuple[float, float | None, float]] = []
+
+    def __call__(self, elapsed: float, primal: float | None, dual: float) -> bool:
+        self.history.append((elapsed, primal, dual))
+        gap = relative_gap(primal, dual)
+        return self.target_gap is not None and gap <= self.target_gap
+
+    def gap_integral(self, end: float) -> float:
+        """
+        時刻 0 から `end` までの相対ギャップの積分 (primal-dual integral) を返す.
+        暫定解がない間のギャップは 1 とする.
+        """
+
+        integral = 0.0
+        gap, last = 1.0, 0.0
+        for elapsed, primal, dual in self.history:
+            elapsed = min(elapsed, end)
+            integral += gap * (elapsed - last)
+            gap, last = relative_gap(primal, dual), elapsed
+        return integral + gap * max(0.0, end - last)
+
+
+def relative_gap(primal: float | None, dual: float) -> float:
+    """
+    相対ギャップ `(primal - dual) / primal` を `[0, 1]` の範囲で返す. 暫定解がなければ 1.
+    """
+
+    if primal is None or primal <= 0:
+        return 1.0
+    return min(1.0, max(0.0, (primal - dual) / primal))
@@ -0,0 +1,174 @@
+"""
+問題インスタンスから導出される前計算テーブル.
+
+計算したテーブルは `Instance.tables` に名前付きで格納され,
+`container.dump` でインスタンスと一緒にバイナリファイルへ保存できる.
+
+- `"next"`: 各文字列の次出現位置テーブル. `next_occurrence` を参照.
+- `"scs2"`, `"scs2_index"`: 文字列の全ての組の 2 文字列 SCS 長テーブル. `scs2` を参照.
+"""
+
+import math
+
+import numpy as np
+
+from .instance import Instance, as_instance
+
+NAMES = ("next", "scs2")
+
+
+def next_positions(codes: np.ndarray, q: int) -> np.ndarray:
+    """
+    次出現位置テーブルを返す. 次出現位置テーブルは全てこの関数で構築する.
+
+    `codes` の最後の軸を長さ `L` の添字の列とみなし, 返り値は `(..., L + 1, q)` 型の int32 配列で,
+    `[..., p, c]` には `p` 文字目以降で添字 `c` が最初に現れる位置が入る.
+    現れない場合は `L` とする. `q` 以上の添字 (埋め草など) は無視する.
+
+    Args:
+        codes(np.ndarray): 添字の配列
+        q(int): アルファベットの大きさ
+    """
+
+    *batch, length = codes.shape
+    count = math.prod(batch)
+    positions = np.arange(length, dtype=np.int32)
+
+    # hits[r, p, c] = p (p 文字目が c のとき) を平らな添字で書き込む. 列 q は捨てる.
+    hits = np.full((count, length + 1, q + 1), length, dtype=np.int32)
+    index = np.minimum(codes.reshape(count, length), q, dtype=np.int64)
+    index += np.arange(count)[:, None] * ((length + 1) * (q + 1))
+    index += positions * (q + 1)
+    hits.reshape(-1)[index] = positions
+    table = np.minimum.accumulate(hits[:, ::-1], axis=1)[:, ::-1, :q]
+    return table.reshape(*batch, length + 1, q)
+
+
+def next_occurrence(instance: Instance) -> np.ndarray:
+    """
+    各文字列の次出現位置テーブルを縦に連結した `(len(codes) + n, len(chars))` 型の配列を返す.
+
+    `i` 番目の文字列の位置 `p` について, 行 `offsets[i] + i + p` の列 `c` には
+    `i` 番目の文字列の `p` 文字目以降で文字 `chars[c]` が最初に現れる位置が入る.
+    現れない場合はその文字列の長さが入る.
+
+    Args:
+        instance(Instance): 問題インスタンス
+    """
+
+    q = len(instance.chars)
+    lengths = instance.lengths
+    table = np.empty((len(instance.codes) + len(instance), q), dtype=np.int32)
+    for i, (start, length) in enumerate(
+        zip(instance.offsets[:-1].tolist(), lengths.tolist())
+    ):
+        table[start + i : start + i + length + 1] = next_positions(instance.code(i), q)
+    return table
+
+
+def scs2_pair(codes1: np.ndarray, codes2: np.ndarray) -> np.ndarray:
+    """
+    2 つの文字列の接尾辞同士の SCS 長テーブルを返す.
+
+    返り値は `(len1 + 1, len2 + 1)` 型の配列で, `[i1, i2]` には `s1[i1:]` と `s2[i2:]` の SCS 長が入る.
+
+    行 `i1` の値は `dp[i1, i2] = min(a[i2], dp[i1, i2 + 1] + 1)` の形の漸化式を満たすので,
+    `a[t] + t` の右からの累積最小値を取ることで 1 行ずつまとめて計算する.
+
+    Args:
+        codes1(np.ndarray): 1 つ目の文字列の添字の配列
+        codes2(np.ndarray): 2 つ目の文字列の添字の配列
+    """
+
+    len1, len2 = len(codes1), len(codes2)
+    dp = np.empty((len1 + 1, len2 + 1), dtype=np.int32)
+    dp[len1] = np.arange(len2, -1, -1)
+    columns = np.arange(len2 + 1, dtype=np.int32)
+    for i1 in range(len1 - 1, -1, -1):
+        below = dp[i1 + 1]
+        a = np.empty(len2 + 1, dtype=np.int32)
+        a[len2] = len1 - i1
+        a[:len2] = np.where(codes2 == codes1[i1], below[1:], below[:-1]) + 1
+        dp[i1] = np.minimum.accumulate((a + columns)[::-1])[::-1] - columns
+    return dp
+
+
+def scs2(instance: Instance) -> tuple[np.ndarray, np.ndarray]:
+    """
+    文字列の全ての組 `(i, j)` (`j < i`) について `scs2_pair` のテーブルを計算し,
+    平らにして連結した配列とその開始位置の配列の組を返す.
+    テーブルの型は値が収まる範囲で int16 または int32 とする.
+
+    組は `(1, 0), (2, 0), (2, 1), (3, 0), ...` の順に並び,
+    組 `(i, j)` の番号は `i * (i - 1) // 2 + j` となる.
+
+    Args:
+        instance(Instance): 問題インスタンス
+    """
+
+    n = len(instance)
+    sizes = [
+        (len1 + 1) * (len2 + 1)
+        for i, len1 in enumerate(instance.lengths.tolist())
+        for len2 in instance.lengths[:i].tolist()
+    ]
+    index = np.zeros(n * (n - 1) // 2 + 1, dtype=np.int64)
+    np.cumsum(sizes, out=index[1:])
+
+    # 値は 2 つの文字列の長さの和以下なので, 収まれば int16 で持ってサイズを半分にする
+    longest = int(instance.lengths.max()) if n > 0 else 0
+    dtype = np.int16 if 2 * longest <= np.iinfo(np.int16).max else np.int32
+    flat = np.empty(int(index[-1]), dtype=dtype)
+    pair = 0
+    for i in range(n):
+        for j in range(i):
+            flat[index[pair] : index[pair + 1]] = scs2_pair(
+                instance.code(i), instance.code(j)
+            ).ravel()
+            pair += 1
+    return flat, index
+
+
+def scs2_table(instance: Instance, i: int, j: int) -> np.ndarray:
+    """
+    `i` 番目と `j` 番目 (`j < i`) の文字列の `scs2_pair` のテーブルを返す.
+
+    `instance.tables` に `"scs2"` があればそのビューを返し, なければその場で計算する.
+
+    Args:
+        instance(Instance): 問題インスタンス
+        i(int): 1 つ目の文字列の番号
+        j(int): 2 つ目の文字列の番号
+    """
+
+    assert j < i
+    if "scs2" not in instance.tables:
+        return scs2_pair(instance.code(i), instance.code(j))
+
+    pair = i * (i - 1) // 2 + j
+    index = instance.tables["scs2_index"]
+    shape = (int(instance.lengths[i]) + 1, int(instance.lengths[j]) + 1)
+    return instance.tables["scs2"][index[pair] : index[pair + 1]].reshape(shape)
+
+
+def compute(instance: list[str] | Instance, names: tuple[str, ...] = NAMES) -> Instance:
+    """
+    指定した名前の前計算テーブルを計算して `instance.tables` に格納する.
+    既に格納されているものは計算し直さない.
+
+    Args:
+        instance(list[str] | Instance): 問題インスタンス. `Instance` でなければ符号化したものに格納して返す.
+        names(tuple[str, ...]): テーブル名. `"next"` と `"scs2"` を指定できる.
+    """
+
+    instance = as_instance(instance)
+    for name in names:
+        if name in instance.tables:
+            continue
+        if name == "next":
+            instance.tables["next"] = next_occurrence(instance)
+        elif name == "scs2":
+            instance.tables["scs2"], instance.tables["scs2_index"] = scs2(instance)
+        else:
+            raise ValueError(f"未知のテーブル名です: {name}")
+    return instance